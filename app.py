@@ -1,27 +1,66 @@
-from flask import Flask, render_template_string, request, redirect, url_for, flash
-from flask import session, send_file, jsonify, make_response
+from flask import Flask, Blueprint, current_app, render_template, request, redirect, url_for, flash
+from flask import session, send_file, jsonify, make_response, Response, stream_with_context, g, has_app_context
+from flask.cli import AppGroup
+import click
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import os
 import csv
-import io
 import json
+import base64
+import zlib
 from functools import wraps
+from contextlib import contextmanager
 import secrets
-import pandas as pd
-from sqlalchemy import or_
+import hmac
+import random
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+import threading
+import queue
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+from itertools import islice
+from sqlalchemy import or_, and_, bindparam, func, text, column, insert, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.expression import UpdateBase
+from sqlalchemy.exc import OperationalError, IntegrityError, SQLAlchemyError
+from markupsafe import Markup, escape
+from jinja2 import FileSystemBytecodeCache
 import re
-from textblob import TextBlob  # For sentiment analysis
+from pdf_export import PDFTableWriter
+from sentiment import load_classifier, CachedClassifier, init_worker, classify_in_worker
+from metrics import RequestMetrics, CountingConnection
+import synthetic
+import migrations
 
-# Initialize Flask application
-app = Flask(__name__)
-app.config['SECRET_KEY'] = secrets.token_hex(16)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///feedback.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Reads in views marked with @replica_reads go to the 'replica' bind when
+# DATABASE_REPLICA_URI is set. Flushes and INSERT/UPDATE/DELETE statements
+# always go to the primary, as does everything outside those views.
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not isinstance(clause, UpdateBase)
+                and has_app_context() and g.get('replica_reads')):
+            replica = self._db.engines.get('replica')
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Every route is registered on this blueprint; create_app attaches it
+main = Blueprint('main', __name__)
+
+# Per-request timings and counters, served by /metrics
+request_metrics = RequestMetrics()
 
-# Initialize database
-db = SQLAlchemy(app)
 
 # Define models
 class Feedback(db.Model):
@@ -32,6 +71,16 @@ class Feedback(db.Model):
     message = db.Column(db.Text, nullable=False)
     sentiment = db.Column(db.String(20), nullable=True)
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Created by migrations.py; declared here so the ORM knows about them
+    __table_args__ = (
+        db.Index('ix_feedback_submitted_at_id', 'submitted_at', 'id'),
+        db.Index('ix_feedback_category_submitted_at', 'category', 'submitted_at', 'id'),
+        db.Index('ix_feedback_category_sentiment', 'category', 'sentiment'),
+        db.Index('ix_feedback_unclassified', 'id', sqlite_where=sentiment.is_(None), postgresql_where=sentiment.is_(None)),
+        db.Index('ix_feedback_updated_at_id', 'updated_at', 'id'),
+    )
     
     def to_dict(self):
         return {
@@ -41,7 +90,8 @@ class Feedback(db.Model):
             'category': self.category,
             'message': self.message,
             'sentiment': self.sentiment,
-            'submitted_at': self.submitted_at.strftime('%Y-%m-%d %H:%M:%S')
+            'submitted_at': self.submitted_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else None
         }
 
 class User(db.Model):
@@ -55,15 +105,250 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
-# Create database tables
-with app.app_context():
-    db.create_all()
-    # Create default admin user if not exists
-    if not User.query.filter_by(username='admin').first():
-        admin = User(username='admin')
-        admin.set_password('admin123')
-        db.session.add(admin)
+# Feedback counts per day, category and sentiment ('Pending' while unclassified).
+# Maintained by triggers on feedback, see migrations.py.
+class DailyStats(db.Model):
+    __tablename__ = 'feedback_daily_stats'
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    sentiment = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_feedback_daily_stats_category_sentiment', 'category', 'sentiment', 'count'),
+    )
+
+# SQLite FTS5 index over name, message and email. Triggers keep it in
+# sync with the feedback table; without FTS5 search falls back to LIKE.
+class SearchIndex:
+    SNIPPET_START = '\x02'
+    SNIPPET_END = '\x03'
+
+    def __init__(self):
+        self._enabled = None
+
+    @property
+    def enabled(self):
+        # Created by init_database; other processes only check that it exists
+        if self._enabled is None:
+            self._enabled = db.engine.dialect.name == 'sqlite' and db.session.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'feedback_fts'"
+            )).first() is not None
+        return self._enabled
+
+    def ensure(self):
+        if db.engine.dialect.name != 'sqlite':
+            return
+        try:
+            exists = db.session.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'feedback_fts'"
+            )).first()
+            if not exists:
+                db.session.execute(text(
+                    "CREATE VIRTUAL TABLE feedback_fts USING fts5("
+                    "name, message, email, content='feedback', content_rowid='id', "
+                    "tokenize='unicode61', prefix='2 3')"
+                ))
+                db.session.execute(text("INSERT INTO feedback_fts(feedback_fts) VALUES ('rebuild')"))
+            db.session.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS feedback_fts_insert AFTER INSERT ON feedback BEGIN "
+                "INSERT INTO feedback_fts(rowid, name, message, email) VALUES (new.id, new.name, new.message, new.email); END"
+            ))
+            db.session.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS feedback_fts_delete AFTER DELETE ON feedback BEGIN "
+                "INSERT INTO feedback_fts(feedback_fts, rowid, name, message, email) "
+                "VALUES ('delete', old.id, old.name, old.message, old.email); END"
+            ))
+            db.session.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS feedback_fts_update AFTER UPDATE OF name, message, email ON feedback BEGIN "
+                "INSERT INTO feedback_fts(feedback_fts, rowid, name, message, email) "
+                "VALUES ('delete', old.id, old.name, old.message, old.email); "
+                "INSERT INTO feedback_fts(rowid, name, message, email) VALUES (new.id, new.name, new.message, new.email); END"
+            ))
+            db.session.commit()
+            self._enabled = True
+        except OperationalError:
+            # SQLite was built without FTS5
+            db.session.rollback()
+            self._enabled = False
+            current_app.logger.warning('FTS5 is not available; archive search will use LIKE')
+
+    def match_expression(self, search_query):
+        # Every word must match, each as a prefix: "wond visit" -> "wond"* "visit"*
+        terms = re.findall(r'\w+', search_query)
+        return ' '.join('"%s"*' % term for term in terms)
+
+    def filter(self, query, search_query):
+        match = self.match_expression(search_query) if self.enabled else ''
+        if not match:
+            return query.filter(or_(
+                Feedback.name.contains(search_query),
+                Feedback.message.contains(search_query),
+                Feedback.email.contains(search_query)
+            ))
+        
+        matching_ids = text('SELECT rowid FROM feedback_fts WHERE feedback_fts MATCH :fts_match')
+        return query.filter(Feedback.id.in_(matching_ids.bindparams(fts_match=match).columns(column('rowid'))))
+
+    def snippets(self, feedback_ids, search_query):
+        # Highlighted message excerpts for the given rows, keyed by id
+        match = self.match_expression(search_query) if self.enabled else ''
+        if not match or not feedback_ids:
+            return {}
+        
+        rows = db.session.execute(text(
+            "SELECT rowid, snippet(feedback_fts, 1, :start, :end, '...', 24) FROM feedback_fts "
+            "WHERE feedback_fts MATCH :fts_match AND rowid IN (%s)" % ','.join(str(int(i)) for i in feedback_ids)
+        ), {'start': self.SNIPPET_START, 'end': self.SNIPPET_END, 'fts_match': match})
+        return {row[0]: self.highlight(row[1]) for row in rows if self.SNIPPET_START in row[1]}
+
+    def highlight(self, snippet):
+        return Markup(str(escape(snippet)).replace(self.SNIPPET_START, '<mark>').replace(self.SNIPPET_END, '</mark>'))
+
+    def search(self, search_query, limit):
+        # Best matches first, ranked by bm25
+        match = self.match_expression(search_query) if self.enabled else ''
+        if not match:
+            return []
+        
+        return db.session.execute(text(
+            "SELECT feedback.id, feedback.name, feedback.category, feedback.sentiment, feedback.submitted_at, "
+            "snippet(feedback_fts, 1, :start, :end, '...', 24) AS snippet, bm25(feedback_fts) AS rank "
+            "FROM feedback_fts JOIN feedback ON feedback.id = feedback_fts.rowid "
+            "WHERE feedback_fts MATCH :fts_match ORDER BY rank LIMIT :limit"
+        ).columns(
+            Feedback.id, Feedback.name, Feedback.category, Feedback.sentiment, Feedback.submitted_at,
+            column('snippet'), column('rank')
+        ), {'start': self.SNIPPET_START, 'end': self.SNIPPET_END, 'fts_match': match, 'limit': limit}).all()
+
+search_index = SearchIndex()
+
+# Held while one-time setup runs, so processes that start together take
+# turns instead of racing to create the secret key or migrate the schema
+@contextmanager
+def startup_lock(app):
+    os.makedirs(app.instance_path, exist_ok=True)
+    with open(os.path.join(app.instance_path, 'startup.lock'), 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+# Try to take a lock in the instance folder that is held for the rest of this
+# process's life; returns the open file, or None if another process holds it.
+# The lock goes away with the process, so a restarted worker can claim it.
+def claim_process_lock(app, name):
+    os.makedirs(app.instance_path, exist_ok=True)
+    lock_file = open(os.path.join(app.instance_path, name), 'a+b')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+# Call with startup_lock held: the first worker writes the key, the rest read it
+def load_secret_key(app):
+    path = os.path.join(app.instance_path, 'secret_key')
+    if not os.path.exists(path):
+        with open(path + '.part', 'w') as f:
+            f.write(secrets.token_hex(32))
+        os.chmod(path + '.part', 0o600)
+        os.replace(path + '.part', path)
+    with open(path) as f:
+        return f.read().strip()
+
+def seed_admin():
+    if User.query.filter_by(username='admin').first():
+        return
+    admin = User(username='admin')
+    admin.set_password(current_app.config['ADMIN_PASSWORD'])
+    db.session.add(admin)
+    try:
         db.session.commit()
+    except IntegrityError:
+        # Created by another process using the same database
+        db.session.rollback()
+
+# Per-connection SQLite settings. 'tuned' lets the dashboard keep reading
+# while submissions are written (WAL), waits for a busy lock instead of
+# failing, and gives each connection a larger page cache and memory-mapped
+# reads; 'default' leaves SQLite's own settings alone
+SQLITE_PROFILES = {
+    'default': {},
+    'tuned': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,
+        'temp_store': 'MEMORY'
+    }
+}
+
+def sqlite_pragmas(config):
+    pragmas = dict(SQLITE_PROFILES[config['SQLITE_PROFILE']])
+    pragmas.update(config['SQLITE_PRAGMAS'] or {})
+    for name in pragmas:
+        if not re.fullmatch(r'[a-z_]+', name):
+            raise ValueError('Invalid SQLite pragma name: %r' % name)
+    return pragmas
+
+# Runs the pragmas on every connection the engine opens. busy_timeout goes
+# first so switching the journal mode waits for other processes
+def configure_sqlite(engine, pragmas):
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    ordered = sorted(pragmas.items(), key=lambda item: item[0] != 'busy_timeout')
+    
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in ordered:
+                cursor.execute('PRAGMA %s = %s' % (name, value))
+        finally:
+            cursor.close()
+
+# Pool settings for file databases. In-memory SQLite keeps Flask-SQLAlchemy's
+# single shared connection, since each new connection would be a new database.
+# With metrics enabled, SQLite connections count the rows each request fetches
+def engine_options(uri, config):
+    url = make_url(uri)
+    options = {}
+    if url.get_backend_name() == 'sqlite':
+        if config['METRICS_ENABLED']:
+            options['connect_args'] = {'factory': CountingConnection}
+        if url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory':
+            return options
+    options.update(
+        pool_size=config['DATABASE_POOL_SIZE'],
+        max_overflow=config['DATABASE_POOL_OVERFLOW'],
+        pool_timeout=config['DATABASE_POOL_TIMEOUT']
+    )
+    return options
+
+# One-time setup, run by `flask feedback init` rather than on every start:
+# upgrade the schema, create the search index and the default admin user
+def init_database():
+    with startup_lock(current_app):
+        applied = migrations.upgrade(db.engine)
+        search_index.ensure()
+        seed_admin()
+    return applied
 
 # Predefined categories
 CATEGORIES = [
@@ -81,45 +366,555 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if 'logged_in' not in session:
             flash('Please log in to access this page', 'danger')
-            return redirect(url_for('admin_login'))
+            return redirect(url_for('main.admin_login'))
         return f(*args, **kwargs)
     return decorated_function
 
-# Helper function for sentiment analysis
+# Send this request's reads to the replica, for listing and export views that
+# can serve data a moment behind the primary. Goes outside @conditional so
+# the ETag comes from the same database as the response.
+def replica_reads(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.replica_reads = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+# Conditional GET for read-only views. The ETag is derived from the data
+# version, so a matching request gets a 304 before any query runs.
+# Last-Modified only has whole seconds, so the latest write's time is rounded
+# up and only sent once that second has passed: any later write then has a
+# newer changed_at, and If-Modified-Since cannot hide it behind a stale 304.
+def conditional(public_max_age=None):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Pages carrying flash messages are one-off and never cached
+            if '_flashes' in session:
+                return f(*args, **kwargs)
+            
+            is_admin = 'logged_in' in session
+            version, changed_at = data_version.current()
+            last_modified = changed_at.replace(microsecond=0)
+            if last_modified < changed_at:
+                last_modified += timedelta(seconds=1)
+            if last_modified > datetime.utcnow():
+                last_modified = None
+            key = '%d|%s|%s' % (version, request.full_path, session.get('username', '') if is_admin else '')
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+            
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = (last_modified is not None and request.if_modified_since is not None
+                                and request.if_modified_since.replace(tzinfo=None) >= changed_at)
+            
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            if public_max_age is not None and not is_admin:
+                response.headers['Cache-Control'] = 'public, max-age=%d' % current_app.config[public_max_age]
+            else:
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
+
+# Helper functions for sentiment analysis
+_classifier = None
+_classifier_lock = threading.Lock()
+
+def get_classifier():
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = load_classifier(current_app.config['SENTIMENT_CLASSIFIER'])
+            if current_app.config['SENTIMENT_CACHE_SIZE']:
+                _classifier = CachedClassifier(
+                    _classifier,
+                    size=current_app.config['SENTIMENT_CACHE_SIZE'],
+                    ttl=current_app.config['SENTIMENT_CACHE_TTL'],
+                    path=current_app.config['SENTIMENT_CACHE_PATH']
+                )
+        return _classifier
+
 def analyze_sentiment(text):
-    analysis = TextBlob(text)
-    # Determine sentiment based on polarity
-    if analysis.sentiment.polarity > 0.1:
-        return "Positive"
-    elif analysis.sentiment.polarity < -0.1:
-        return "Negative"
-    else:
-        return "Neutral"
+    return analyze_sentiments([text])[0]
+
+def analyze_sentiments(texts):
+    with request_metrics.sentiment(len(texts)):
+        return get_classifier().classify(texts)
+
+# Background worker pool that classifies feedback after it has been committed
+class SentimentWorker:
+    # Seconds between attempts when the backlog can't be read, e.g. before
+    # `flask feedback init` has created the schema
+    BACKLOG_RETRY_SECONDS = 30
+
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.last_lag = 0.0
+        self._backlog_lock = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.app.config['SENTIMENT_WORKERS']):
+                thread = threading.Thread(target=self._run, name='sentiment-worker-%d' % i, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        # Pick up rows that were left unclassified by a previous run. Only one
+        # process scans for them; the others just classify their own submissions
+        self._backlog_lock = claim_process_lock(self.app, 'sentiment-backlog.lock')
+        if self._backlog_lock is not None:
+            threading.Thread(target=self._scan_backlog, name='sentiment-backlog', daemon=True).start()
+
+    def enqueue(self, feedback_id):
+        self._queue.put((feedback_id, time.time()))
+
+    def _scan_backlog(self):
+        # Queues the backlog a batch at a time, waiting for the queue to drain
+        # in between, so neither start() nor memory grows with its size
+        last_id = 0
+        while True:
+            try:
+                with self.app.app_context():
+                    ids = [feedback_id for (feedback_id,) in unclassified_query().filter(
+                        Feedback.id > last_id).limit(self.app.config['SENTIMENT_BATCH_SIZE'])]
+            except Exception:
+                self.app.logger.exception('Could not read the sentiment backlog, retrying in %d seconds',
+                                          self.BACKLOG_RETRY_SECONDS)
+                time.sleep(self.BACKLOG_RETRY_SECONDS)
+                continue
+            if not ids:
+                return
+            for feedback_id in ids:
+                self.enqueue(feedback_id)
+            last_id = ids[-1]
+            self.wait()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def lag(self):
+        # Seconds the oldest queued item has been waiting
+        with self._queue.mutex:
+            if not self._queue.queue:
+                return 0.0
+            return time.time() - self._queue.queue[0][1]
+
+    def stats(self):
+        return {
+            'running': bool(self._threads),
+            'workers': len(self._threads),
+            'queue_depth': self.queue_depth(),
+            'pending_tasks': self._queue.unfinished_tasks,
+            'lag_seconds': round(self.lag(), 3),
+            'last_batch_lag_seconds': round(self.last_lag, 3),
+            'processed': self.processed
+        }
+
+    def wait(self, timeout=None):
+        # Block until every queued item has been classified
+        deadline = None if timeout is None else time.time() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.app.config['SENTIMENT_BATCH_SIZE']:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                with self.app.app_context():
+                    self._classify(batch)
+            except Exception:
+                self.app.logger.exception('Sentiment worker failed on a batch of %d rows', len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _classify(self, batch):
+        ids = [feedback_id for feedback_id, _ in batch]
+        rows = db.session.query(Feedback.id, Feedback.message).filter(
+            Feedback.id.in_(ids), Feedback.sentiment.is_(None)
+        ).all()
+        sentiments = analyze_sentiments([row.message for row in rows])
+        updates = [{'b_id': row.id, 'b_sentiment': sentiment} for row, sentiment in zip(rows, sentiments)]
+        if updates:
+            table = Feedback.__table__
+            db.session.execute(
+                table.update().where(table.c.id == bindparam('b_id')).values(sentiment=bindparam('b_sentiment')),
+                updates
+            )
+            db.session.commit()
+        self.processed += len(updates)
+        if updates:
+            data_changed('updated', [update['b_id'] for update in updates])
+        self.last_lag = time.time() - min(enqueued_at for _, enqueued_at in batch)
+
+sentiment_worker = SentimentWorker()
+
+def unclassified_query():
+    return db.session.query(Feedback.id).filter(Feedback.sentiment.is_(None)).order_by(Feedback.id)
+
+# Version of the feedback data, shared by every worker process. Triggers bump
+# it in the same transaction as each write to feedback (see migrations.py).
+class FeedbackVersion(db.Model):
+    __tablename__ = 'feedback_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False)
+
+class DataVersion:
+    def current(self):
+        # (version, changed_at), read fresh rather than from the session's identity map
+        return tuple(db.session.execute(
+            db.select(FeedbackVersion.version, FeedbackVersion.changed_at).where(FeedbackVersion.id == 1)
+        ).one())
+
+    @property
+    def value(self):
+        return self.current()[0]
+
+data_version = DataVersion()
+
+# Call after committing any change to Feedback rows; event ('created',
+# 'updated' or 'deleted') and ids tell live dashboards what changed
+def data_changed(event='changed', ids=()):
+    feedback_stats.invalidate()
+    feedback_events.publish(event, ids)
+
+# Aggregate counts for the dashboard, computed with a single GROUP BY and
+# cached until the data version moves on (in this or any other process)
+class FeedbackStats:
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._cached = None
+        self._version = None
+        self._computed_at = 0.0
+
+    def init_app(self, app):
+        self.app = app
+
+    def get(self):
+        version = data_version.value
+        with self._lock:
+            expired = time.time() - self._computed_at > self.app.config['STATS_CACHE_SECONDS']
+            if self._cached is None or expired or version != self._version:
+                self._cached = self._compute()
+                self._version = version
+                self._computed_at = time.time()
+            return self._cached
+
+    def invalidate(self):
+        with self._lock:
+            self._cached = None
+
+    def query(self):
+        # Summed from the daily rollup rather than counted from feedback
+        return db.session.query(
+            DailyStats.category, DailyStats.sentiment, func.sum(DailyStats.count)
+        ).group_by(DailyStats.category, DailyStats.sentiment)
+
+    def _compute(self):
+        rows = self.query().all()
+        
+        stats = {'total': 0, 'sentiment': {}, 'category': {}}
+        for category, sentiment, count in rows:
+            stats['total'] += count
+            stats['sentiment'][sentiment] = stats['sentiment'].get(sentiment, 0) + count
+            stats['category'][category] = stats['category'].get(category, 0) + count
+        return stats
+
+feedback_stats = FeedbackStats()
+
+# In-process publish/subscribe of feedback changes for the dashboard's live
+# feed. Each process only sees the writes it made itself.
+class FeedbackEvents:
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        # Seeded from the clock so ids from an earlier process are never replayed
+        self._last_id = int(time.time() * 1000)
+        self._recent = deque()
+
+    def init_app(self, app):
+        self.app = app
+        self._recent = deque(self._recent, maxlen=app.config['EVENTS_REPLAY_SIZE'])
+
+    def publish(self, kind, ids=()):
+        with self._lock:
+            self._last_id += 1
+            event = (self._last_id, kind, list(ids))
+            self._recent.append(event)
+            for subscription in self._subscribers:
+                subscription.put(event)
+            return self._last_id
+
+    def subscribe(self, last_event_id=None):
+        # None when this process already serves EVENTS_MAX_STREAMS streams
+        subscription = Subscription(self.app.config['EVENTS_QUEUE_SIZE'])
+        with self._lock:
+            if len(self._subscribers) >= self.app.config['EVENTS_MAX_STREAMS']:
+                return None
+            if last_event_id is not None and last_event_id != self._last_id:
+                # Replay what a reconnecting client missed, if all of it is still buffered
+                missed = [event for event in self._recent if event[0] > last_event_id]
+                if missed and missed[0][0] == last_event_id + 1:
+                    for event in missed:
+                        subscription.put(event)
+                else:
+                    subscription.overflowed = True
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+class Subscription:
+    def __init__(self, max_size):
+        self._queue = queue.Queue()
+        self.max_size = max_size
+        self.overflowed = False
+
+    def put(self, event):
+        # A client that falls this far behind reloads instead of catching up
+        if self._queue.qsize() >= self.max_size:
+            self.overflowed = True
+        else:
+            self._queue.put(event)
+
+    def get(self, timeout):
+        # Everything queued so far, waiting up to timeout for the first event
+        try:
+            events = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+feedback_events = FeedbackEvents()
+
+def timeseries_query(start, end, category=None):
+    query = db.session.query(DailyStats.day, DailyStats.sentiment, func.sum(DailyStats.count)).filter(
+        DailyStats.day >= start, DailyStats.day <= end
+    )
+    if category:
+        query = query.filter(DailyStats.category == category)
+    return query.group_by(DailyStats.day, DailyStats.sentiment)
+
+# Recount the rollup from feedback, e.g. after editing rows with triggers disabled
+def rebuild_daily_stats():
+    db.session.query(DailyStats).delete()
+    db.session.execute(insert(DailyStats).from_select(
+        ['day', 'category', 'sentiment', 'count'],
+        db.session.query(
+            func.date(Feedback.submitted_at), Feedback.category,
+            func.coalesce(Feedback.sentiment, 'Pending'), func.count(Feedback.id)
+        ).filter(Feedback.submitted_at.isnot(None)).group_by(
+            func.date(Feedback.submitted_at), Feedback.category, Feedback.sentiment
+        )
+    ))
+    db.session.commit()
+    data_changed()
+    return db.session.query(func.count()).select_from(DailyStats).scalar()
+
+# Background PDF export jobs, keyed by filter set and data version
+class ExportJobs:
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._executor = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def export_dir(self):
+        path = os.path.join(self.app.instance_path, 'exports')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def path_for(self, job_id):
+        return os.path.join(self.export_dir(), job_id + '.pdf')
+
+    def submit(self, filters):
+        key = json.dumps([filters, data_version.value], sort_keys=True)
+        job_id = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        
+        with self._lock:
+            job = self.get(job_id)
+            if job and job['status'] != 'failed':
+                return job
+            
+            job = {'id': job_id, 'status': 'queued', 'rows': 0, 'pages': 0, 'lossy_rows': 0, 'error': None,
+                   'created_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}
+            self._jobs[job_id] = job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.app.config['EXPORT_WORKERS'], thread_name_prefix='pdf-export')
+            job['future'] = self._executor.submit(self._run, job, filters)
+            return job
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None and re.fullmatch(r'[0-9a-f]{40}', job_id) and os.path.exists(self.path_for(job_id)):
+            # Finished by an earlier process; serve it straight from the cache
+            job = {'id': job_id, 'status': 'done', 'rows': None, 'pages': None, 'lossy_rows': None, 'error': None,
+                   'created_at': None}
+            self._jobs[job_id] = job
+        return job
+
+    def wait(self, job_id, timeout=None):
+        job = self._jobs.get(job_id)
+        if job and 'future' in job:
+            job['future'].result(timeout)
+        return job
+
+    def _run(self, job, filters):
+        job['status'] = 'running'
+        path = self.path_for(job['id'])
+        partial = path + '.part'
+        try:
+            with self.app.app_context(), open(partial, 'wb') as fileobj:
+                g.replica_reads = True
+                writer = PDFTableWriter(
+                    fileobj,
+                    [('ID', 4), ('Name', 12), ('Email', 16), ('Category', 11), ('Message', 40), ('Sentiment', 8), ('Submitted At', 12)],
+                    'Visitor Feedback Export',
+                    subtitle='Generated on %s' % datetime.utcnow().strftime('%B %d, %Y at %I:%M %p UTC'),
+                    footer='© 2025 Visitor Feedback Archive System'
+                )
+                for row in export_query(filters).yield_per(self.app.config['EXPORT_BATCH_SIZE']):
+                    writer.add_row([
+                        row.id,
+                        row.name,
+                        row.email or '',
+                        row.category,
+                        row.message,
+                        row.sentiment or '',
+                        row.submitted_at.strftime('%Y-%m-%d %H:%M:%S')
+                    ])
+                    job['rows'] = writer.rows
+                    job['pages'] = writer.pages
+                    job['lossy_rows'] = writer.lossy_rows
+                writer.close()
+                job['pages'] = writer.pages
+            os.replace(partial, path)
+            job['status'] = 'done'
+            self._prune()
+        except Exception as e:
+            self.app.logger.exception('PDF export %s failed', job['id'])
+            job['status'] = 'failed'
+            job['error'] = str(e)
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def _prune(self):
+        # Keep only the most recent exports on disk
+        directory = self.export_dir()
+        files = sorted(
+            (os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.pdf')),
+            key=os.path.getmtime,
+            reverse=True
+        )
+        for path in files[self.app.config['EXPORT_CACHE_SIZE']:]:
+            os.remove(path)
+            self._jobs.pop(os.path.basename(path)[:-len('.pdf')], None)
+
+export_jobs = ExportJobs()
+
+# Pages whose only per-request content is flash messages are rendered
+# once and served from memory until a flash message needs to be shown
+_static_pages = {}
+
+def render_static(template_name, **context):
+    if '_flashes' in session or current_app.jinja_env.auto_reload:
+        return render_template(template_name, **context)
+    
+    key = (template_name, request.script_root)
+    if key not in _static_pages:
+        _static_pages[key] = render_template(template_name, **context)
+    return _static_pages[key]
 
 # Routes
-@app.route('/')
+@main.route('/')
 def index():
-    return render_template_string(INDEX_TEMPLATE)
+    return render_static('index.html', categories=CATEGORIES)
+
+@main.route('/about')
+def about():
+    return render_static('about.html')
 
-@app.route('/submit', methods=['POST'])
+# Validation shared by the form and the bulk API; returns an error message or None
+def validate_feedback(name, email, category, message):
+    # Basic validation
+    if not name or not category or not message:
+        return 'Please fill in all required fields'
+    
+    # Email validation if provided
+    if email and not re.match(r"[^@]+@[^@]+\.[^@]+", email):
+        return 'Please enter a valid email address'
+    
+    # Longer values don't fit the columns, and PostgreSQL rejects them
+    for field, value in (('name', name), ('email', email), ('category', category)):
+        length = Feedback.__table__.c[field].type.length
+        if value and len(value) > length:
+            return '%s must be at most %d characters' % (field.capitalize(), length)
+    
+    return None
+
+@main.route('/submit', methods=['POST'])
 def submit_feedback():
     name = request.form.get('name')
     email = request.form.get('email')
     category = request.form.get('category')
     message = request.form.get('message')
     
-    # Basic validation
-    if not name or not category or not message:
-        flash('Please fill in all required fields', 'danger')
-        return redirect(url_for('index'))
-    
-    # Email validation if provided
-    if email and not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-        flash('Please enter a valid email address', 'danger')
-        return redirect(url_for('index'))
+    error = validate_feedback(name, email, category, message)
+    if error:
+        flash(error, 'danger')
+        return redirect(url_for('main.index'))
     
-    # Analyze sentiment
-    sentiment = analyze_sentiment(message)
+    # Analyze sentiment inline only when the background worker is disabled
+    sentiment = None if current_app.config['SENTIMENT_ASYNC'] else analyze_sentiment(message)
     
     # Create new feedback
     new_feedback = Feedback(
@@ -132,55 +927,153 @@ def submit_feedback():
     
     db.session.add(new_feedback)
     db.session.commit()
+    data_changed('created', [new_feedback.id])
+    
+    if sentiment is None:
+        sentiment_worker.start()
+        sentiment_worker.enqueue(new_feedback.id)
     
     flash('Thank you for your feedback!', 'success')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/archive')
-def archive():
-    category = request.args.get('category', '')
-    date_start = request.args.get('date_start', '')
-    date_end = request.args.get('date_end', '')
-    search_query = request.args.get('search', '')
+# Columns the listing, export and event routes read. feedback_rows() returns
+# them as named, read-only Row tuples: unlike Feedback instances they skip the
+# identity map and change tracking, which makes each row several times
+# cheaper to load (benchmarks/bench_rows.py)
+LISTING_COLUMNS = [
+    Feedback.id, Feedback.name, Feedback.email, Feedback.category,
+    Feedback.message, Feedback.sentiment, Feedback.submitted_at
+]
+
+def feedback_rows(*columns):
+    return db.session.query(*(columns or LISTING_COLUMNS))
+
+# Rows for the archive and dashboard lists: the message is cut to a preview in
+# SQL, and "truncated" says whether there is more to fetch
+def preview_rows():
+    length = current_app.config['MESSAGE_PREVIEW_LENGTH']
+    columns = [func.substr(Feedback.message, 1, length).label('message') if column is Feedback.message else column
+               for column in LISTING_COLUMNS]
+    return feedback_rows(*columns, (func.length(Feedback.message) > length).label('truncated'))
+
+# Filters shared by the archive listing and its "load more" endpoint
+def feedback_filters():
+    return {
+        'category': request.args.get('category', ''),
+        'date_start': request.args.get('date_start', ''),
+        'date_end': request.args.get('date_end', ''),
+        'search': request.args.get('search', '')
+    }
+
+def filter_feedback(query, filters):
+    if filters['category'] and filters['category'] != 'All':
+        query = query.filter(Feedback.category == filters['category'])
     
-    # Base query
-    query = Feedback.query
+    if filters['date_start']:
+        query = query.filter(Feedback.submitted_at >= datetime.strptime(filters['date_start'], '%Y-%m-%d'))
     
-    # Apply filters
-    if category and category != 'All':
-        query = query.filter_by(category=category)
+    if filters['date_end']:
+        query = query.filter(Feedback.submitted_at <= datetime.strptime(filters['date_end'] + ' 23:59:59', '%Y-%m-%d %H:%M:%S'))
     
-    if date_start:
-        query = query.filter(Feedback.submitted_at >= datetime.strptime(date_start, '%Y-%m-%d'))
+    if filters['search']:
+        query = search_index.filter(query, filters['search'])
     
-    if date_end:
-        query = query.filter(Feedback.submitted_at <= datetime.strptime(date_end + ' 23:59:59', '%Y-%m-%d %H:%M:%S'))
+    return query
+
+# Opaque keyset cursors over (submitted_at, id)
+def encode_cursor(timestamp, feedback_id):
+    raw = '%s|%d' % (timestamp.isoformat(), feedback_id)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        submitted_at, feedback_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(submitted_at), int(feedback_id)
+    except (ValueError, UnicodeError):
+        return None
+
+def get_page_size(default=None, maximum=None):
+    page_size = request.args.get('page_size', default or current_app.config['ARCHIVE_PAGE_SIZE'], type=int)
+    return max(1, min(page_size, maximum or current_app.config['ARCHIVE_MAX_PAGE_SIZE']))
+
+# Newest-first on submitted_at by default; incremental sync walks updated_at forwards
+def keyset_query(query, cursor, page_size, column=Feedback.submitted_at, descending=True):
+    if cursor:
+        timestamp, feedback_id = cursor
+        if descending:
+            query = query.filter(or_(column < timestamp, and_(column == timestamp, Feedback.id < feedback_id)))
+        else:
+            query = query.filter(or_(column > timestamp, and_(column == timestamp, Feedback.id > feedback_id)))
     
-    if search_query:
-        query = query.filter(or_(
-            Feedback.name.contains(search_query),
-            Feedback.message.contains(search_query),
-            Feedback.email.contains(search_query)
-        ))
+    order = [column.desc(), Feedback.id.desc()] if descending else [column.asc(), Feedback.id.asc()]
+    return query.order_by(*order).limit(page_size + 1)
+
+# Fetch one page newest-first, returning the rows and the cursor for the next page
+def keyset_page(query, cursor, page_size):
+    rows = keyset_query(query, cursor, page_size).all()
+    next_cursor = encode_cursor(rows[page_size - 1].submitted_at, rows[page_size - 1].id) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+def render_archive_items(feedback_list, filters, is_admin):
+    snippets = search_index.snippets([feedback.id for feedback in feedback_list], filters['search']) if filters['search'] else {}
+    return render_template('_archive_items.html', feedback_list=feedback_list, snippets=snippets, is_admin=is_admin)
+
+@main.route('/archive')
+@replica_reads
+@conditional(public_max_age='ARCHIVE_CACHE_SECONDS')
+def archive():
+    filters = feedback_filters()
+    cursor = decode_cursor(request.args.get('cursor', ''))
     
-    # Get all feedback sorted by newest first
-    feedback_list = query.order_by(Feedback.submitted_at.desc()).all()
+    # Only the first page is rendered; later pages come from archive_more
+    try:
+        query = filter_feedback(preview_rows(), filters)
+    except ValueError:
+        flash('Dates must be in YYYY-MM-DD format', 'danger')
+        return redirect(url_for('main.archive', **{key: filters[key] for key in ('category', 'search') if filters[key]}))
+    feedback_list, next_cursor = keyset_page(query, cursor, get_page_size())
     
     # Check if user is logged in as admin
     is_admin = 'logged_in' in session
     
-    return render_template_string(
-        ARCHIVE_TEMPLATE, 
+    items_html = render_archive_items(feedback_list, filters, is_admin)
+    
+    return render_template(
+        'archive.html', 
         feedback_list=feedback_list, 
+        items_html=items_html,
+        next_cursor=next_cursor,
         categories=CATEGORIES,
-        current_category=category,
-        date_start=date_start,
-        date_end=date_end,
-        search_query=search_query,
+        current_category=filters['category'],
+        date_start=filters['date_start'],
+        date_end=filters['date_end'],
+        search_query=filters['search'],
         is_admin=is_admin
     )
 
-@app.route('/admin/login', methods=['GET', 'POST'])
+@main.route('/archive/more')
+@replica_reads
+@conditional(public_max_age='ARCHIVE_CACHE_SECONDS')
+def archive_more():
+    cursor = decode_cursor(request.args.get('cursor', ''))
+    if cursor is None:
+        return jsonify({'error': 'A valid cursor is required'}), 400
+    
+    filters = feedback_filters()
+    try:
+        query = filter_feedback(preview_rows(), filters)
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+    feedback_list, next_cursor = keyset_page(query, cursor, get_page_size())
+    
+    html = render_archive_items(feedback_list, filters, 'logged_in' in session)
+    return jsonify({
+        'html': html,
+        'count': len(feedback_list),
+        'next_cursor': next_cursor
+    })
+
+@main.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
     if request.method == 'POST':
         username = request.form.get('username')
@@ -192,1287 +1085,929 @@ def admin_login():
             session['logged_in'] = True
             session['username'] = username
             flash('Login successful!', 'success')
-            return redirect(url_for('admin_dashboard'))
+            return redirect(url_for('main.admin_dashboard'))
         else:
             flash('Invalid username or password', 'danger')
     
-    return render_template_string(ADMIN_LOGIN_TEMPLATE)
+    return render_template('admin_login.html')
 
-@app.route('/admin/logout')
+@main.route('/admin/logout')
 def admin_logout():
     session.pop('logged_in', None)
     session.pop('username', None)
     flash('You have been logged out', 'info')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/admin')
+@main.route('/admin')
 @admin_required
+@replica_reads
+@conditional()
 def admin_dashboard():
-    feedback_list = Feedback.query.order_by(Feedback.submitted_at.desc()).all()
-    return render_template_string(
-        ADMIN_DASHBOARD_TEMPLATE, 
+    cursor = decode_cursor(request.args.get('cursor', ''))
+    feedback_list, next_cursor = keyset_page(preview_rows(), cursor, get_page_size(current_app.config['ADMIN_PAGE_SIZE']))
+    return render_template(
+        'admin_dashboard.html', 
         feedback_list=feedback_list,
+        next_cursor=next_cursor,
+        is_first_page=cursor is None,
+        stats=feedback_stats.get(),
         categories=CATEGORIES
     )
 
-@app.route('/admin/delete/<int:feedback_id>', methods=['POST'])
+@main.route('/admin/delete/<int:feedback_id>', methods=['POST'])
 @admin_required
 def delete_feedback(feedback_id):
     feedback = Feedback.query.get_or_404(feedback_id)
     db.session.delete(feedback)
     db.session.commit()
+    data_changed('deleted', [feedback_id])
     flash('Feedback deleted successfully', 'success')
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard'))
 
-@app.route('/archive/delete/<int:feedback_id>', methods=['POST'])
+@main.route('/archive/delete/<int:feedback_id>', methods=['POST'])
 @admin_required
 def delete_feedback_from_archive(feedback_id):
     feedback = Feedback.query.get_or_404(feedback_id)
     db.session.delete(feedback)
     db.session.commit()
+    data_changed('deleted', [feedback_id])
     flash('Feedback deleted successfully', 'success')
     
     # Preserve the existing filter parameters
-    return redirect(url_for('archive', 
+    return redirect(url_for('main.archive', 
                           category=request.args.get('category', ''),
                           date_start=request.args.get('date_start', ''),
                           date_end=request.args.get('date_end', ''),
                           search=request.args.get('search', '')))
 
-@app.route('/export/<format>')
+# Server-sent events for the dashboard: each message carries the rendered rows
+# that were created or updated, which of them are new, the ids that were
+# deleted and fresh stats
+@main.route('/admin/events')
 @admin_required
+def admin_events():
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscription = feedback_events.subscribe(last_event_id)
+    if subscription is None:
+        # Every stream holds a request thread, so leave the rest for other requests
+        response = Response('Too many live feeds are open on this worker\n', status=503, mimetype='text/plain')
+        response.headers['Retry-After'] = str(current_app.config['EVENTS_HEARTBEAT_SECONDS'])
+        return response
+    
+    def stream():
+        try:
+            yield 'retry: %d\n\n' % (current_app.config['EVENTS_HEARTBEAT_SECONDS'] * 1000)
+            while True:
+                if subscription.overflowed:
+                    yield 'event: reset\ndata: {}\n\n'
+                    return
+                events = subscription.get(current_app.config['EVENTS_HEARTBEAT_SECONDS'])
+                if not events:
+                    # Comment line that keeps proxies from closing an idle stream
+                    yield ': keep-alive\n\n'
+                    continue
+                yield render_feedback_event(events)
+                # Hand the connection back to the pool while the stream waits,
+                # since the request context stays open as long as the stream
+                db.session.remove()
+        finally:
+            feedback_events.unsubscribe(subscription)
+    
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Coalesce queued events into one SSE message, rendering at most a page of rows
+def render_feedback_event(events):
+    changed, created, deleted = set(), set(), set()
+    for _, kind, ids in events:
+        if kind == 'deleted':
+            deleted.update(ids)
+            changed.difference_update(ids)
+            created.difference_update(ids)
+        elif kind in ('created', 'updated'):
+            changed.update(ids)
+            if kind == 'created':
+                created.update(ids)
+    
+    newest = sorted(changed, reverse=True)[:current_app.config['ADMIN_PAGE_SIZE']]
+    rows = preview_rows().filter(Feedback.id.in_(newest)).order_by(
+        Feedback.submitted_at.desc(), Feedback.id.desc()).all() if newest else []
+    data = {
+        'rows': render_template('_admin_rows.html', feedback_list=rows),
+        'created': sorted(created.intersection(newest)),
+        'deleted': sorted(deleted),
+        'stats': feedback_stats.get()
+    }
+    return 'id: %d\nevent: feedback\ndata: %s\n\n' % (events[-1][0], json.dumps(data))
+
+# csv.writer target that hands back each formatted line instead of buffering it
+class _CSVLine:
+    def write(self, value):
+        return value
+
+def export_query(filters):
+    query = filter_feedback(feedback_rows(), filters)
+    return query.order_by(Feedback.submitted_at.desc(), Feedback.id.desc())
+
+# Stream filtered feedback as CSV, one batch of rows per chunk
+def generate_csv(query, compress=False):
+    writer = csv.writer(_CSVLine())
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    
+    def emit(lines):
+        chunk = ''.join(lines).encode('utf-8')
+        return compressor.compress(chunk) if compressor else chunk
+    
+    lines = [writer.writerow(['ID', 'Name', 'Email', 'Category', 'Message', 'Sentiment', 'Submitted At'])]
+    for row in query.yield_per(batch_size):
+        lines.append(writer.writerow([
+            row.id,
+            row.name,
+            row.email,
+            row.category,
+            row.message,
+            row.sentiment,
+            row.submitted_at.strftime('%Y-%m-%d %H:%M:%S')
+        ]))
+        if len(lines) >= batch_size:
+            yield emit(lines)
+            lines = []
+    
+    yield emit(lines)
+    if compressor:
+        yield compressor.flush()
+
+@main.route('/export/<format>')
+@admin_required
+@replica_reads
 def export_feedback(format):
-    feedback_list = Feedback.query.order_by(Feedback.submitted_at.desc()).all()
+    # Filter dates are parsed before anything streams; once a CSV has started,
+    # a bad one could only cut the download short
+    filters = feedback_filters()
+    try:
+        query = export_query(filters)
+    except ValueError:
+        flash('Dates must be in YYYY-MM-DD format', 'danger')
+        return redirect(url_for('main.admin_dashboard'))
     
     if format == 'csv':
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write headers
-        writer.writerow(['ID', 'Name', 'Email', 'Category', 'Message', 'Sentiment', 'Submitted At'])
-        
-        # Write data
-        for feedback in feedback_list:
-            writer.writerow([
-                feedback.id,
-                feedback.name,
-                feedback.email,
-                feedback.category,
-                feedback.message,
-                feedback.sentiment,
-                feedback.submitted_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-        
-        output.seek(0)
+        compress = request.args.get('gzip', '') in ('1', 'true')
+        filename = 'feedback_export.csv.gz' if compress else 'feedback_export.csv'
         
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name='feedback_export.csv'
+        return Response(
+            stream_with_context(generate_csv(query, compress)),
+            mimetype='application/gzip' if compress else 'text/csv',
+            headers={'Content-Disposition': 'attachment; filename=%s' % filename}
         )
     
     elif format == 'pdf':
-        # Create a DataFrame and export as PDF
-        data = []
-        for feedback in feedback_list:
-            data.append(feedback.to_dict())
+        job = export_jobs.submit(filters)
+        if job['status'] == 'done':
+            return redirect(url_for('main.export_job_download', job_id=job['id']))
         
-        df = pd.DataFrame(data)
-        
-        # Use pandas to create an HTML table
-        html_table = df.to_html(classes='table table-striped')
-        
-        # Render a template with the HTML table
-        pdf_content = render_template_string(PDF_EXPORT_TEMPLATE, table=html_table)
-        
-        # Return the PDF content as a response
-        response = make_response(pdf_content)
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = 'attachment; filename=feedback_export.pdf'
-        
-        return response
+        return render_template('export_job.html', job=export_job_status(job))
     
     else:
         flash('Invalid export format', 'danger')
-        return redirect(url_for('admin_dashboard'))
+        return redirect(url_for('main.admin_dashboard'))
+
+def export_job_status(job):
+    status = {key: value for key, value in job.items() if key != 'future'}
+    status['status_url'] = url_for('main.export_job_status_view', job_id=job['id'])
+    status['download_url'] = url_for('main.export_job_download', job_id=job['id']) if job['status'] == 'done' else None
+    return status
 
-@app.route('/api/feedback', methods=['GET'])
+@main.route('/export/jobs/<job_id>')
+@admin_required
+def export_job_status_view(job_id):
+    job = export_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Export job not found'}), 404
+    return jsonify(export_job_status(job))
+
+@main.route('/export/jobs/<job_id>/download')
+@admin_required
+def export_job_download(job_id):
+    job = export_jobs.get(job_id)
+    if job is None or job['status'] != 'done':
+        flash('That export is not ready yet', 'warning')
+        return redirect(url_for('main.admin_dashboard'))
+    
+    return send_file(
+        export_jobs.path_for(job_id),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name='feedback_export.pdf'
+    )
+
+# Columns that /api/feedback can project with ?fields=
+API_FIELDS = {
+    'id': Feedback.id,
+    'name': Feedback.name,
+    'email': Feedback.email,
+    'category': Feedback.category,
+    'message': Feedback.message,
+    'sentiment': Feedback.sentiment,
+    'submitted_at': Feedback.submitted_at,
+    'updated_at': Feedback.updated_at
+}
+
+# Timestamps are stored as naive UTC, so convert any offset the client sends
+def parse_timestamp(value):
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+def api_feedback_query(filters, fields, cursor, page_size, updated_since=None):
+    # Always select the keyset columns so the next cursor can be built
+    sort_column = Feedback.updated_at if updated_since else Feedback.submitted_at
+    columns = [API_FIELDS[field] for field in fields]
+    columns += [column for column in (Feedback.id, sort_column) if column not in columns]
+    
+    query = filter_feedback(feedback_rows(*columns), filters)
+    if updated_since:
+        query = query.filter(Feedback.updated_at >= updated_since)
+    return keyset_query(query, cursor, page_size, column=sort_column, descending=not updated_since)
+
+@main.route('/api/feedback', methods=['GET'])
+@replica_reads
+@conditional()
 def api_get_feedback():
-    feedback_list = Feedback.query.order_by(Feedback.submitted_at.desc()).all()
-    return jsonify([feedback.to_dict() for feedback in feedback_list])
-
-# Template strings
-INDEX_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Visitor Feedback System</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
-    <style>
-        :root {
-            --primary-color: #4e73df;
-            --secondary-color: #6c757d;
-            --success-color: #1cc88a;
-            --info-color: #36b9cc;
-            --warning-color: #f6c23e;
-            --danger-color: #e74a3b;
-            --light-color: #f8f9fc;
-            --dark-color: #5a5c69;
-        }
-        
-        body {
-            font-family: 'Nunito', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            background-color: #f8f9fc;
-            color: #5a5c69;
-        }
-        
-        .navbar {
-            background-color: white;
-            box-shadow: 0 .15rem 1.75rem 0 rgba(58,59,69,.15);
-        }
-        
-        .navbar-brand {
-            font-weight: 700;
-            color: var(--primary-color);
-        }
-        
-        .card {
-            border: none;
-            box-shadow: 0 .15rem 1.75rem 0 rgba(58,59,69,.15);
-            margin-bottom: 30px;
-        }
-        
-        .card-header {
-            background-color: #f8f9fc;
-            border-bottom: 1px solid #e3e6f0;
-            font-weight: 700;
-            color: var(--primary-color);
-        }
-        
-        .btn-primary {
-            background-color: var(--primary-color);
-            border-color: var(--primary-color);
-        }
-        
-        .btn-primary:hover {
-            background-color: #2e59d9;
-            border-color: #2653d4;
-        }
-        
-        footer {
-            background-color: white;
-            border-top: 1px solid #e3e6f0;
-            padding: 15px 0;
-        }
-        
-        .form-control:focus {
-            border-color: #bac8f3;
-            box-shadow: 0 0 0 0.25rem rgba(78, 115, 223, 0.25);
-        }
-        
-        .hero-section {
-            background: linear-gradient(135deg, #4e73df 0%, #224abe 100%);
-            color: white;
-            padding: 60px 0;
-            margin-bottom: 30px;
-        }
-        
-        .feature-icon {
-            font-size: 2rem;
-            margin-bottom: 1rem;
-            color: var(--primary-color);
-        }
-    </style>
-</head>
-<body>
-    <nav class="navbar navbar-expand-lg navbar-light">
-        <div class="container">
-            <a class="navbar-brand" href="{{ url_for('index') }}">
-                <i class="fas fa-comments me-2"></i>Feedback Archive
-            </a>
-            <button class="navbar-toggler" type="button" data-bs-toggle="collapse" data-bs-target="#navbarNav">
-                <span class="navbar-toggler-icon"></span>
-            </button>
-            <div class="collapse navbar-collapse" id="navbarNav">
-                <ul class="navbar-nav ms-auto">
-                    <li class="nav-item">
-                        <a class="nav-link active" href="{{ url_for('index') }}">Submit Feedback</a>
-                    </li>
-                    <li class="nav-item">
-                        <a class="nav-link" href="{{ url_for('archive') }}">View Archive</a>
-                    </li>
-                    <li class="nav-item">
-                        <a class="nav-link" href="{{ url_for('admin_login') }}">Admin</a>
-                    </li>
-                </ul>
-            </div>
-        </div>
-    </nav>
-    
-    <div class="hero-section">
-        <div class="container text-center">
-            <h1>We Value Your Feedback</h1>
-            <p class="lead">Help us improve by sharing your thoughts, suggestions, and experiences</p>
-        </div>
-    </div>
-    
-    <div class="container">
-        {% with messages = get_flashed_messages(with_categories=true) %}
-            {% if messages %}
-                {% for category, message in messages %}
-                    <div class="alert alert-{{ category }} alert-dismissible fade show">
-                        {{ message }}
-                        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                    </div>
-                {% endfor %}
-            {% endif %}
-        {% endwith %}
-        
-        <div class="row">
-            <div class="col-lg-8">
-                <div class="card">
-                    <div class="card-header">
-                        <i class="fas fa-edit me-2"></i>Submit Your Feedback
-                    </div>
-                    <div class="card-body">
-                        <form action="{{ url_for('submit_feedback') }}" method="post" id="feedbackForm">
-                            <div class="mb-3">
-                                <label for="name" class="form-label">Full Name <span class="text-danger">*</span></label>
-                                <input type="text" class="form-control" id="name" name="name" required>
-                            </div>
-                            
-                            <div class="mb-3">
-                                <label for="email" class="form-label">Email Address <span class="text-muted">(optional)</span></label>
-                                <input type="email" class="form-control" id="email" name="email">
-                                <div class="form-text">We'll never share your email with anyone else.</div>
-                            </div>
-                            
-                            <div class="mb-3">
-                                <label for="category" class="form-label">Feedback Category <span class="text-danger">*</span></label>
-                                <select class="form-select" id="category" name="category" required>
-                                    <option value="" selected disabled>Select a category...</option>
-                                    {% for category in ['General Feedback', 'Bug Report', 'Feature Request', 'Complaint', 'Compliment', 'Question'] %}
-                                        <option value="{{ category }}">{{ category }}</option>
-                                    {% endfor %}
-                                </select>
-                            </div>
-                            
-                            <div class="mb-3">
-                                <label for="message" class="form-label">Your Message <span class="text-danger">*</span></label>
-                                <textarea class="form-control" id="message" name="message" rows="5" required></textarea>
-                                <div class="form-text">Please provide as much detail as possible.</div>
-                            </div>
-                            
-                            <button type="submit" class="btn btn-primary">
-                                <i class="fas fa-paper-plane me-2"></i>Submit Feedback
-                            </button>
-                        </form>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="col-lg-4">
-                <div class="card">
-                    <div class="card-header">
-                        <i class="fas fa-info-circle me-2"></i>Why Your Feedback Matters
-                    </div>
-                    <div class="card-body">
-                        <div class="mb-4 text-center">
-                            <i class="fas fa-lightbulb feature-icon"></i>
-                            <h5>Continuous Improvement</h5>
-                            <p>Your feedback helps us identify areas where we can improve our services.</p>
-                        </div>
-                        
-                        <div class="mb-4 text-center">
-                            <i class="fas fa-users feature-icon"></i>
-                            <h5>Community-Driven</h5>
-                            <p>We value community input and use it to shape our future initiatives.</p>
-                        </div>
-                        
-                        <div class="text-center">
-                            <i class="fas fa-chart-line feature-icon"></i>
-                            <h5>Measurement & Analytics</h5>
-                            <p>Your insights help us measure our performance and make data-driven decisions.</p>
-                        </div>
-                        
-                        <div class="mt-4 text-center">
-                            <a href="{{ url_for('archive') }}" class="btn btn-outline-primary">
-                                <i class="fas fa-archive me-2"></i>View Feedback Archive
-                            </a>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <footer class="mt-5">
-        <div class="container text-center">
-            <p class="mb-0">&copy; 2025 Visitor Feedback Archive. All rights reserved.</p>
-        </div>
-    </footer>
-    
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/js/bootstrap.bundle.min.js"></script>
-    <script>
-        // Client-side validation
-        document.getElementById('feedbackForm').addEventListener('submit', function(event) {
-            let valid = true;
-            const name = document.getElementById('name').value.trim();
-            const email = document.getElementById('email').value.trim();
-            const category = document.getElementById('category').value;
-            const message = document.getElementById('message').value.trim();
-            
-            if (!name) {
-                valid = false;
-                alert('Please enter your name');
-            }
-            
-            if (email && !validateEmail(email)) {
-                valid = false;
-                alert('Please enter a valid email address');
-            }
-            
-            if (!category) {
-                valid = false;
-                alert('Please select a category');
-            }
-            
-            if (!message) {
-                valid = false;
-                alert('Please enter your message');
-            }
-            
-            if (!valid) {
-                event.preventDefault();
-            }
-        });
-        
-        function validateEmail(email) {
-            const re = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
-            return re.test(email);
-        }
-    </script>
-</body>
-</html>
-'''
-
-ARCHIVE_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Feedback Archive</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
-    <style>
-        :root {
-            --primary-color: #4e73df;
-            --secondary-color: #6c757d;
-            --success-color: #1cc88a;
-            --info-color: #36b9cc;
-            --warning-color: #f6c23e;
-            --danger-color: #e74a3b;
-            --light-color: #f8f9fc;
-            --dark-color: #5a5c69;
-        }
-        
-        body {
-            font-family: 'Nunito', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            background-color: #f8f9fc;
-            color: #5a5c69;
-        }
-        
-        .navbar {
-            background-color: white;
-            box-shadow: 0 .15rem 1.75rem 0 rgba(58,59,69,.15);
-        }
-        
-        .navbar-brand {
-            font-weight: 700;
-            color: var(--primary-color);
-        }
-        
-        .card {
-            border: none;
-            box-shadow: 0 .15rem 1.75rem 0 rgba(58,59,69,.15);
-            margin-bottom: 30px;
-        }
-        
-        .card-header {
-            background-color: #f8f9fc;
-            border-bottom: 1px solid #e3e6f0;
-            font-weight: 700;
-            color: var(--primary-color);
-        }
-        
-        .btn-primary {
-            background-color: var(--primary-color);
-            border-color: var(--primary-color);
-        }
-        
-        .btn-primary:hover {
-            background-color: #2e59d9;
-            border-color: #2653d4;
-        }
-        
-        footer {
-            background-color: white;
-            border-top: 1px solid #e3e6f0;
-            padding: 15px 0;
-        }
-        
-        .form-control:focus {
-            border-color: #bac8f3;
-            box-shadow: 0 0 0 0.25rem rgba(78, 115, 223, 0.25);
-        }
-        
-        .page-header {
-            background: linear-gradient(135deg, #4e73df 0%, #224abe 100%);
-            color: white;
-            padding: 30px 0;
-            margin-bottom: 30px;
-        }
-        
-        .feedback-item {
-            transition: transform 0.3s ease;
-        }
-        
-        .feedback-item:hover {
-            transform: translateY(-5px);
-        }
-        
-        .feedback-meta {
-            font-size: 0.85rem;
-            color: #858796;
-        }
-        
-        .sentiment-positive {
-            color: var(--success-color);
-        }
-        
-        .sentiment-negative {
-            color: var(--danger-color);
-        }
-        
-        .sentiment-neutral {
-            color: var(--info-color);
-        }
-    </style>
-</head>
-<body>
-    <nav class="navbar navbar-expand-lg navbar-light">
-        <div class="container">
-            <a class="navbar-brand" href="{{ url_for('index') }}">
-                <i class="fas fa-comments me-2"></i>Feedback Archive
-            </a>
-            <button class="navbar-toggler" type="button" data-bs-toggle="collapse" data-bs-target="#navbarNav">
-                <span class="navbar-toggler-icon"></span>
-            </button>
-            <div class="collapse navbar-collapse" id="navbarNav">
-                <ul class="navbar-nav ms-auto">
-                    <li class="nav-item">
-                        <a class="nav-link" href="{{ url_for('index') }}">Submit Feedback</a>
-                    </li>
-                    <li class="nav-item">
-                        <a class="nav-link active" href="{{ url_for('archive') }}">View Archive</a>
-                    </li>
-                    <li class="nav-item">
-                        <a class="nav-link" href="{{ url_for('admin_login') }}">Admin</a>
-                    </li>
-                </ul>
-            </div>
-        </div>
-    </nav>
-    
-    <div class="page-header">
-        <div class="container">
-            <h1><i class="fas fa-archive me-2"></i>Feedback Archive</h1>
-            <p class="lead">Browse and search through our collection of visitor feedback</p>
-        </div>
-    </div>
-    
-    <div class="container">
-        {% with messages = get_flashed_messages(with_categories=true) %}
-            {% if messages %}
-                {% for category, message in messages %}
-                    <div class="alert alert-{{ category }} alert-dismissible fade show">
-                        {{ message }}
-                        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                    </div>
-                {% endfor %}
-            {% endif %}
-        {% endwith %}
-        
-        <div class="card mb-4">
-            <div class="card-header">
-                <i class="fas fa-filter me-2"></i>Filter Feedback
-            </div>
-            <div class="card-body">
-                <form action="{{ url_for('archive') }}" method="get" id="filterForm">
-                    <div class="row">
-                        <div class="col-md-3 mb-3">
-                            <label for="category" class="form-label">Category</label>
-                            <select class="form-select" id="category" name="category">
-                                <option value="All" {% if current_category == 'All' or not current_category %}selected{% endif %}>All Categories</option>
-                                {% for category in categories %}
-                                    <option value="{{ category }}" {% if current_category == category %}selected{% endif %}>{{ category }}</option>
-                                {% endfor %}
-                            </select>
-                        </div>
-                        
-                        <div class="col-md-3 mb-3">
-                            <label for="date_start" class="form-label">From Date</label>
-                            <input type="date" class="form-control" id="date_start" name="date_start" value="{{ date_start }}">
-                        </div>
-                        
-                        <div class="col-md-3 mb-3">
-                            <label for="date_end" class="form-label">To Date</label>
-                            <input type="date" class="form-control" id="date_end" name="date_end" value="{{ date_end }}">
-                        </div>
-                        
-                        <div class="col-md-3 mb-3">
-                            <label for="search" class="form-label">Search</label>
-                            <div class="input-group">
-                                <input type="text" class="form-control" id="search" name="search" value="{{ search_query }}" placeholder="Search...">
-                                <button class="btn btn-primary" type="submit">
-                                    <i class="fas fa-search"></i>
-                                </button>
-                            </div>
-                        </div>
-                    </div>
-                </form>
-            </div>
-        </div>
-        
-        <div class="row">
-            <div class="col-12">
-                <div class="card">
-                    <div class="card-header d-flex justify-content-between align-items-center">
-                        <div>
-                            <i class="fas fa-list me-2"></i>Feedback Results
-                            <span class="badge bg-primary ms-2">{{ feedback_list|length }}</span>
-                        </div>
-                        {% if is_admin %}
-                        <div>
-                            <span class="badge bg-info">Admin Mode</span>
-                        </div>
-                        {% endif %}
-                    </div>
-                    <div class="card-body">
-                        {% if feedback_list %}
-                            <div class="row">
-                                {% for feedback in feedback_list %}
-                                    <div class="col-lg-6 mb-4">
-                                        <div class="card feedback-item h-100">
-                                            <div class="card-body">
-                                                <h5 class="card-title d-flex justify-content-between">
-                                                    <span>{{ feedback.name }}</span>
-                                                    <span class="badge bg-secondary">{{ feedback.category }}</span>
-                                                </h5>
-                                                <p class="card-text">{{ feedback.message }}</p>
-                                                <div class="feedback-meta d-flex justify-content-between align-items-center">
-                                                    <span class="text-muted">
-                                                        <i class="far fa-clock me-1"></i> 
-                                                        {{ feedback.submitted_at.strftime('%B %d, %Y at %I:%M %p') }}
-                                                    </span>
-                                                    {% if feedback.sentiment %}
-                                                        <span class="
-                                                            {% if feedback.sentiment == 'Positive' %}sentiment-positive
-                                                            {% elif feedback.sentiment == 'Negative' %}sentiment-negative
-                                                            {% else %}sentiment-neutral{% endif %}
-                                                        ">
-                                                            <i class="
-                                                                {% if feedback.sentiment == 'Positive' %}fas fa-smile
-                                                                {% elif feedback.sentiment == 'Negative' %}fas fa-frown
-                                                                {% else %}fas fa-meh{% endif %} me-1
-                                                            "></i>
-                                                            {{ feedback.sentiment }}
-                                                        </span>
-                                                    {% endif %}
-                                                </div>
-                                                
-                                                {% if is_admin %}
-                                                <hr>
-                                                <div class="text-end">
-                                                    <button class="btn btn-sm btn-danger" 
-                                                            data-bs-toggle="modal" 
-                                                            data-bs-target="#archiveDeleteModal{{ feedback.id }}">
-                                                        <i class="fas fa-trash me-1"></i> Delete
-                                                    </button>
-                                                    
-                                                    <!-- Delete Modal -->
-                                                    <div class="modal fade" id="archiveDeleteModal{{ feedback.id }}" tabindex="-1">
-                                                        <div class="modal-dialog">
-                                                            <div class="modal-content">
-                                                                <div class="modal-header">
-                                                                    <h5 class="modal-title">Confirm Deletion</h5>
-                                                                    <button type="button" class="btn-close" data-bs-dismiss="modal"></button>
-                                                                </div>
-                                                                <div class="modal-body">
-                                                                    <p>Are you sure you want to delete this feedback from {{ feedback.name }}?</p>
-                                                                    <p class="text-danger"><small>This action cannot be undone.</small></p>
-                                                                </div>
-                                                                <div class="modal-footer">
-                                                                    <button type="button" class="btn btn-secondary" data-bs-dismiss="modal">Cancel</button>
-                                                                    <form action="{{ url_for('delete_feedback_from_archive', feedback_id=feedback.id,
-                                                                        category=request.args.get('category', ''), 
-                                                                        date_start=request.args.get('date_start', ''),
-                                                                        date_end=request.args.get('date_end', ''),
-                                                                        search=request.args.get('search', '')) }}" method="post">
-                                                                        <button type="submit" class="btn btn-danger">Delete</button>
-                                                                    </form>
-                                                                </div>
-                                                            </div>
-                                                        </div>
-                                                    </div>
-                                                </div>
-                                                {% endif %}
-                                            </div>
-                                        </div>
-                                    </div>
-                                {% endfor %}
-                            </div>
-                        {% else %}
-                            <div class="text-center py-5">
-                                <i class="fas fa-search fa-3x mb-3 text-muted"></i>
-                                <h4>No feedback found</h4>
-                                <p class="text-muted">Try adjusting your filters or search criteria</p>
-                                <a href="{{ url_for('archive') }}" class="btn btn-outline-primary">
-                                    <i class="fas fa-sync-alt me-2"></i>Clear All Filters
-                                </a>
-                            </div>
-                        {% endif %}
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <footer class="mt-5">
-        <div class="container text-center">
-            <p class="mb-0">&copy; 2025 Visitor Feedback Archive. All rights reserved.</p>
-        </div>
-    </footer>
-    
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/js/bootstrap.bundle.min.js"></script>
-    <script>
-        // Auto-submit form when category changes
-        document.getElementById('category').addEventListener('change', function() {
-            document.getElementById('filterForm').submit();
-        });
-    </script>
-</body>
-</html>
-'''
-
-ADMIN_LOGIN_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Admin Login - Feedback Archive</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
-    <style>
-        :root {
-            --primary-color: #4e73df;
-            --secondary-color: #6c757d;
-            --success-color: #1cc88a;
-            --info-color: #36b9cc;
-            --warning-color: #f6c23e;
-            --danger-color: #e74a3b;
-            --light-color: #f8f9fc;
-            --dark-color: #5a5c69;
-        }
-        
-        body {
-            font-family: 'Nunito', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            background-color: #f8f9fc;
-            min-height: 100vh;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        
-        .card {
-            border: none;
-            box-shadow: 0 .15rem 1.75rem 0 rgba(58,59,69,.15);
-        }
-        
-        .card-header {
-            background-color: #f8f9fc;
-            border-bottom: 1px solid #e3e6f0;
-            font-weight: 700;
-            color: var(--primary-color);
-        }
-        
-        .btn-primary {
-            background-color: var(--primary-color);
-            border-color: var(--primary-color);
-        }
-        
-        .btn-primary:hover {
-            background-color: #2e59d9;
-            border-color: #2653d4;
-        }
-        
-        .form-control:focus {
-            border-color: #bac8f3;
-            box-shadow: 0 0 0 0.25rem rgba(78, 115, 223, 0.25);
-        }
-        
-        .login-brand {
-            font-size: 1.75rem;
-            font-weight: 700;
-            color: var(--primary-color);
-            margin-bottom: 1.5rem;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="row justify-content-center">
-            <div class="col-lg-5">
-                {% with messages = get_flashed_messages(with_categories=true) %}
-                    {% if messages %}
-                        {% for category, message in messages %}
-                            <div class="alert alert-{{ category }} alert-dismissible fade show">
-                                {{ message }}
-                                <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                            </div>
-                        {% endfor %}
-                    {% endif %}
-                {% endwith %}
-                
-                <div class="card shadow-lg border-0 rounded-lg">
-                    <div class="card-header">
-                        <h3 class="text-center font-weight-light my-2">Admin Login</h3>
-                    </div>
-                    <div class="card-body">
-                        <div class="text-center mb-4">
-                            <div class="login-brand">
-                                <i class="fas fa-comments"></i> Feedback Archive
-                            </div>
-                            <p class="text-muted">Access the admin dashboard to manage feedback</p>
-                        </div>
-                        
-                        <form action="{{ url_for('admin_login') }}" method="post">
-                            <div class="mb-3">
-                                <label for="username" class="form-label">Username</label>
-                                <div class="input-group">
-                                    <span class="input-group-text">
-                                        <i class="fas fa-user"></i>
-                                    </span>
-                                    <input type="text" class="form-control" id="username" name="username" required>
-                                </div>
-                            </div>
-                            
-                            <div class="mb-4">
-                                <label for="password" class="form-label">Password</label>
-                                <div class="input-group">
-                                    <span class="input-group-text">
-                                        <i class="fas fa-lock"></i>
-                                    </span>
-                                    <input type="password" class="form-control" id="password" name="password" required>
-                                </div>
-                            </div>
-                            
-                            <div class="d-grid">
-                                <button type="submit" class="btn btn-primary">
-                                    <i class="fas fa-sign-in-alt me-2"></i>Login
-                                </button>
-                            </div>
-                        </form>
-                    </div>
-                    <div class="card-footer text-center py-3">
-                        <div class="small">
-                            <a href="{{ url_for('index') }}" class="text-decoration-none">
-                                <i class="fas fa-arrow-left me-1"></i> Return to Feedback Form
-                            </a>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/js/bootstrap.bundle.min.js"></script>
-</body>
-</html>
-'''
-
-ADMIN_DASHBOARD_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Admin Dashboard - Feedback Archive</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
-    <style>
-        :root {
-            --primary-color: #4e73df;
-            --secondary-color: #6c757d;
-            --success-color: #1cc88a;
-            --info-color: #36b9cc;
-            --warning-color: #f6c23e;
-            --danger-color: #e74a3b;
-            --light-color: #f8f9fc;
-            --dark-color: #5a5c69;
-        }
-        
-        body {
-            font-family: 'Nunito', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            background-color: #f8f9fc;
-            color: #5a5c69;
-        }
-        
-        .navbar {
-            background-color: white;
-            box-shadow: 0 .15rem 1.75rem 0 rgba(58,59,69,.15);
-        }
-        
-        .navbar-brand {
-            font-weight: 700;
-            color: var(--primary-color);
-        }
-        
-        .card {
-            border: none;
-            box-shadow: 0 .15rem 1.75rem 0 rgba(58,59,69,.15);
-            margin-bottom: 30px;
-        }
-        
-        .card-header {
-            background-color: #f8f9fc;
-            border-bottom: 1px solid #e3e6f0;
-            font-weight: 700;
-            color: var(--primary-color);
-        }
-        
-        .btn-primary {
-            background-color: var(--primary-color);
-            border-color: var(--primary-color);
-        }
-        
-        .btn-primary:hover {
-            background-color: #2e59d9;
-            border-color: #2653d4;
-        }
-        
-        footer {
-            background-color: white;
-            border-top: 1px solid #e3e6f0;
-            padding: 15px 0;
-        }
-        
-        .form-control:focus {
-            border-color: #bac8f3;
-            box-shadow: 0 0 0 0.25rem rgba(78, 115, 223, 0.25);
-        }
-        
-        .page-header {
-            background: linear-gradient(135deg, #4e73df 0%, #224abe 100%);
-            color: white;
-            padding: 30px 0;
-            margin-bottom: 30px;
-        }
-        
-        .stats-card {
-            border-left: .25rem solid;
-            border-radius: .35rem;
-        }
-        
-        .stats-card-primary {
-            border-left-color: var(--primary-color);
-        }
-        
-        .stats-card-success {
-            border-left-color: var(--success-color);
-        }
-        
-        .stats-card-info {
-            border-left-color: var(--info-color);
-        }
-        
-        .stats-card-warning {
-            border-left-color: var(--warning-color);
-        }
-        
-        .stats-icon {
-            color: #dddfeb;
-            font-size: 2rem;
-        }
-        
-        .stats-text {
-            font-size: 0.875rem;
-            font-weight: 700;
-            color: var(--primary-color);
-            text-transform: uppercase;
-        }
-        
-        .stats-number {
-            font-size: 1.5rem;
-            font-weight: 700;
-            color: var(--dark-color);
-        }
-        
-        .sentiment-positive {
-            color: var(--success-color);
-        }
-        
-        .sentiment-negative {
-            color: var(--danger-color);
-        }
-        
-        .sentiment-neutral {
-            color: var(--info-color);
-        }
-        
-        .table-responsive {
-            max-height: 600px;
-            overflow-y: auto;
-        }
-    </style>
-</head>
-<body>
-    <nav class="navbar navbar-expand-lg navbar-light">
-        <div class="container">
-            <a class="navbar-brand" href="{{ url_for('admin_dashboard') }}">
-                <i class="fas fa-comments me-2"></i>Admin Dashboard
-            </a>
-            <button class="navbar-toggler" type="button" data-bs-toggle="collapse" data-bs-target="#navbarNav">
-                <span class="navbar-toggler-icon"></span>
-            </button>
-            <div class="collapse navbar-collapse" id="navbarNav">
-                <ul class="navbar-nav ms-auto">
-                    <li class="nav-item">
-                        <a class="nav-link" href="{{ url_for('index') }}">
-                            <i class="fas fa-file-alt me-1"></i> Feedback Form
-                        </a>
-                    </li>
-                    <li class="nav-item">
-                        <a class="nav-link" href="{{ url_for('archive') }}">
-                            <i class="fas fa-archive me-1"></i> Public Archive
-                        </a>
-                    </li>
-                    <li class="nav-item dropdown">
-                        <a class="nav-link dropdown-toggle" href="#" id="exportDropdown" role="button" data-bs-toggle="dropdown">
-                            <i class="fas fa-download me-1"></i> Export
-                        </a>
-                        <ul class="dropdown-menu" aria-labelledby="exportDropdown">
-                            <li>
-                                <a class="dropdown-item" href="{{ url_for('export_feedback', format='csv') }}">
-                                    <i class="fas fa-file-csv me-2"></i> Export as CSV
-                                </a>
-                            </li>
-                            <li>
-                                <a class="dropdown-item" href="{{ url_for('export_feedback', format='pdf') }}">
-                                    <i class="fas fa-file-pdf me-2"></i> Export as PDF
-                                </a>
-                            </li>
-                        </ul>
-                    </li>
-                    <li class="nav-item">
-                        <a class="nav-link" href="{{ url_for('admin_logout') }}">
-                            <i class="fas fa-sign-out-alt me-1"></i> Logout
-                        </a>
-                    </li>
-                </ul>
-            </div>
-        </div>
-    </nav>
-    
-    <div class="page-header">
-        <div class="container">
-            <h1><i class="fas fa-tachometer-alt me-2"></i>Admin Dashboard</h1>
-            <p class="lead">Manage and analyze visitor feedback</p>
-        </div>
-    </div>
-    
-    <div class="container">
-        {% with messages = get_flashed_messages(with_categories=true) %}
-            {% if messages %}
-                {% for category, message in messages %}
-                    <div class="alert alert-{{ category }} alert-dismissible fade show">
-                        {{ message }}
-                        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                    </div>
-                {% endfor %}
-            {% endif %}
-        {% endwith %}
-        
-        <!-- Statistics Row -->
-        <div class="row mb-4">
-            <!-- Total Feedback -->
-            <div class="col-xl-3 col-md-6 mb-4">
-                <div class="card stats-card stats-card-primary h-100 py-2">
-                    <div class="card-body">
-                        <div class="row align-items-center">
-                            <div class="col">
-                                <div class="stats-text">Total Feedback</div>
-                                <div class="stats-number">{{ feedback_list|length }}</div>
-                            </div>
-                            <div class="col-auto">
-                                <i class="fas fa-comments fa-2x stats-icon"></i>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- Positive Sentiment -->
-            <div class="col-xl-3 col-md-6 mb-4">
-                <div class="card stats-card stats-card-success h-100 py-2">
-                    <div class="card-body">
-                        <div class="row align-items-center">
-                            <div class="col">
-                                <div class="stats-text">Positive</div>
-                                <div class="stats-number">
-                                    {{ feedback_list|selectattr('sentiment', 'equalto', 'Positive')|list|length }}
-                                </div>
-                            </div>
-                            <div class="col-auto">
-                                <i class="fas fa-smile fa-2x stats-icon"></i>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- Neutral Sentiment -->
-            <div class="col-xl-3 col-md-6 mb-4">
-                <div class="card stats-card stats-card-info h-100 py-2">
-                    <div class="card-body">
-                        <div class="row align-items-center">
-                            <div class="col">
-                                <div class="stats-text">Neutral</div>
-                                <div class="stats-number">
-                                    {{ feedback_list|selectattr('sentiment', 'equalto', 'Neutral')|list|length }}
-                                </div>
-                            </div>
-                            <div class="col-auto">
-                                <i class="fas fa-meh fa-2x stats-icon"></i>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- Negative Sentiment -->
-            <div class="col-xl-3 col-md-6 mb-4">
-                <div class="card stats-card stats-card-warning h-100 py-2">
-                    <div class="card-body">
-                        <div class="row align-items-center">
-                            <div class="col">
-                                <div class="stats-text">Negative</div>
-                                <div class="stats-number">
-                                    {{ feedback_list|selectattr('sentiment', 'equalto', 'Negative')|list|length }}
-                                </div>
-                            </div>
-                            <div class="col-auto">
-                                <i class="fas fa-frown fa-2x stats-icon"></i>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <div class="card">
-            <div class="card-header">
-                <i class="fas fa-table me-2"></i>Feedback Management
-            </div>
-            <div class="card-body">
-                <div class="table-responsive">
-                    <table class="table table-striped" id="feedbackTable">
-                        <thead>
-                            <tr>
-                                <th>ID</th>
-                                <th>Name</th>
-                                <th>Email</th>
-                                <th>Category</th>
-                                <th>Message</th>
-                                <th>Sentiment</th>
-                                <th>Date & Time</th>
-                                <th>Actions</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {% for feedback in feedback_list %}
-                                <tr>
-                                    <td>{{ feedback.id }}</td>
-                                    <td>{{ feedback.name }}</td>
-                                    <td>{{ feedback.email or 'N/A' }}</td>
-                                    <td>
-                                        <span class="badge bg-secondary">{{ feedback.category }}</span>
-                                    </td>
-                                    <td>
-                                        <button class="btn btn-sm btn-outline-primary" 
-                                                data-bs-toggle="modal" 
-                                                data-bs-target="#messageModal{{ feedback.id }}">
-                                            View Message
-                                        </button>
-                                        
-                                        <!-- Message Modal -->
-                                        <div class="modal fade" id="messageModal{{ feedback.id }}" tabindex="-1">
-                                            <div class="modal-dialog">
-                                                <div class="modal-content">
-                                                    <div class="modal-header">
-                                                        <h5 class="modal-title">Message from {{ feedback.name }}</h5>
-                                                        <button type="button" class="btn-close" data-bs-dismiss="modal"></button>
-                                                    </div>
-                                                    <div class="modal-body">
-                                                        <p>{{ feedback.message }}</p>
-                                                    </div>
-                                                    <div class="modal-footer">
-                                                        <button type="button" class="btn btn-secondary" data-bs-dismiss="modal">Close</button>
-                                                    </div>
-                                                </div>
-                                            </div>
-                                        </div>
-                                    </td>
-                                    <td>
-                                        <span class="
-                                            {% if feedback.sentiment == 'Positive' %}sentiment-positive
-                                            {% elif feedback.sentiment == 'Negative' %}sentiment-negative
-                                            {% else %}sentiment-neutral{% endif %}
-                                        ">
-                                            <i class="
-                                                {% if feedback.sentiment == 'Positive' %}fas fa-smile
-                                                {% elif feedback.sentiment == 'Negative' %}fas fa-frown
-                                                {% else %}fas fa-meh{% endif %} me-1
-                                            "></i>
-                                            {{ feedback.sentiment }}
-                                        </span>
-                                    </td>
-                                    <td>{{ feedback.submitted_at.strftime('%Y-%m-%d %H:%M') }}</td>
-                                    <td>
-                                        <button class="btn btn-sm btn-danger" 
-                                                data-bs-toggle="modal" 
-                                                data-bs-target="#deleteModal{{ feedback.id }}">
-                                            <i class="fas fa-trash"></i>
-                                        </button>
-                                        
-                                        <!-- Delete Modal -->
-                                        <div class="modal fade" id="deleteModal{{ feedback.id }}" tabindex="-1">
-                                            <div class="modal-dialog">
-                                                <div class="modal-content">
-                                                    <div class="modal-header">
-                                                        <h5 class="modal-title">Confirm Deletion</h5>
-                                                        <button type="button" class="btn-close" data-bs-dismiss="modal"></button>
-                                                    </div>
-                                                    <div class="modal-body">
-                                                        <p>Are you sure you want to delete this feedback from {{ feedback.name }}?</p>
-                                                        <p class="text-danger"><small>This action cannot be undone.</small></p>
-                                                    </div>
-                                                    <div class="modal-footer">
-                                                        <button type="button" class="btn btn-secondary" data-bs-dismiss="modal">Cancel</button>
-                                                        <form action="{{ url_for('delete_feedback', feedback_id=feedback.id) }}" method="post">
-                                                            <button type="submit" class="btn btn-danger">Delete</button>
-                                                        </form>
-                                                    </div>
-                                                </div>
-                                            </div>
-                                        </div>
-                                    </td>
-                                </tr>
-                            {% endfor %}
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <footer class="mt-5">
-        <div class="container text-center">
-            <p class="mb-0">&copy; 2025 Visitor Feedback Archive. All rights reserved.</p>
-        </div>
-    </footer>
-    
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/js/bootstrap.bundle.min.js"></script>
-</body>
-</html>
-'''
-
-PDF_EXPORT_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Feedback Export</title>
-    <style>
-        body {
-            font-family: Arial, sans-serif;
-            margin: 20px;
-        }
-        h1 {
-            color: #4e73df;
-            text-align: center;
-        }
-        .header {
-            text-align: center;
-            margin-bottom: 30px;
-        }
-        .export-date {
-            color: #6c757d;
-            font-style: italic;
-            text-align: center;
-            margin-bottom: 20px;
-        }
-        table {
-            width: 100%;
-            border-collapse: collapse;
-            margin-bottom: 20px;
-        }
-        th {
-            background-color: #4e73df;
-            color: white;
-            text-align: left;
-            padding: 8px;
-        }
-        td {
-            border: 1px solid #ddd;
-            padding: 8px;
-        }
-        tr:nth-child(even) {
-            background-color: #f2f2f2;
-        }
-        .footer {
-            margin-top: 30px;
-            text-align: center;
-            font-size: 12px;
-            color: #6c757d;
-        }
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>Visitor Feedback Export</h1>
-    </div>
-    
-    <div class="export-date">
-        Generated on {{ datetime.utcnow().strftime('%B %d, %Y at %I:%M %p UTC') }}
-    </div>
-    
-    {{ table|safe }}
-    
-    <div class="footer">
-        <p>© 2025 Visitor Feedback Archive System</p>
-    </div>
-</body>
-</html>
-'''
-
-# Run the application
+    fields = [field for field in request.args.get('fields', '').split(',') if field] or list(API_FIELDS)
+    unknown = [field for field in fields if field not in API_FIELDS]
+    if unknown:
+        return jsonify({'error': 'Unknown fields: %s' % ', '.join(unknown)}), 400
+    
+    cursor = None
+    if request.args.get('cursor'):
+        cursor = decode_cursor(request.args['cursor'])
+        if cursor is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    try:
+        filters = feedback_filters()
+        updated_since = parse_timestamp(request.args['updated_since']) if request.args.get('updated_since') else None
+        page_size = get_page_size(current_app.config['API_PAGE_SIZE'], current_app.config['API_MAX_PAGE_SIZE'])
+        rows = api_feedback_query(filters, fields, cursor, page_size, updated_since).all()
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD (or ISO 8601 for updated_since) format'}), 400
+    
+    results = []
+    for row in rows[:page_size]:
+        item = {}
+        for field in fields:
+            value = getattr(row, field)
+            item[field] = value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime) else value
+        results.append(item)
+    
+    response = jsonify(results)
+    # The body stays a plain list; the next page is advertised in headers
+    if len(rows) > page_size:
+        last = rows[page_size - 1]
+        next_cursor = encode_cursor(last.updated_at if updated_since else last.submitted_at, last.id)
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = '<%s>; rel="next"' % url_for('main.api_get_feedback', _external=True, **args)
+    return response
+
+# One feedback entry in full, for list views that only show a preview
+@main.route('/api/feedback/<int:feedback_id>', methods=['GET'])
+@replica_reads
+@conditional()
+def api_get_feedback_detail(feedback_id):
+    row = feedback_rows(*API_FIELDS.values()).filter(Feedback.id == feedback_id).first()
+    if row is None:
+        return jsonify({'error': 'Feedback not found'}), 404
+    
+    return jsonify({
+        field: value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime) else value
+        for field, value in row._mapping.items()
+    })
+
+# Parse a bulk body into (index, item or None, error or None) entries
+def parse_bulk_body():
+    body = request.get_data(as_text=True)
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        entries = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append((len(entries), json.loads(line), None))
+            except ValueError:
+                entries.append((len(entries), None, 'Invalid JSON'))
+        return entries
+    
+    items = json.loads(body)
+    if not isinstance(items, list):
+        raise ValueError('Expected a JSON array')
+    return [(index, item, None) for index, item in enumerate(items)]
+
+# Validate one bulk item and turn it into a row for the insert
+def bulk_row(item):
+    if not isinstance(item, dict):
+        return None, 'Expected a JSON object'
+    
+    fields = {key: item.get(key) for key in ('name', 'email', 'category', 'message', 'submitted_at')}
+    if any(value is not None and not isinstance(value, str) for value in fields.values()):
+        return None, 'All fields must be strings'
+    
+    error = validate_feedback(fields['name'], fields['email'], fields['category'], fields['message'])
+    if error:
+        return None, error
+    
+    # Replayed entries keep the time they were originally submitted
+    if fields['submitted_at']:
+        try:
+            fields['submitted_at'] = parse_timestamp(fields['submitted_at'])
+        except ValueError:
+            return None, 'submitted_at must be an ISO 8601 timestamp'
+    else:
+        fields['submitted_at'] = datetime.utcnow()
+    # Stored now, so incremental syncs (?updated_since=) pick up backdated rows
+    fields['updated_at'] = datetime.utcnow()
+    return fields, None
+
+@main.route('/api/feedback/bulk', methods=['POST'])
+def api_bulk_feedback():
+    try:
+        entries = parse_bulk_body()
+    except ValueError as e:
+        return jsonify({'error': 'Could not parse request body: %s' % e}), 400
+    
+    if len(entries) > current_app.config['BULK_MAX_ROWS']:
+        return jsonify({'error': 'At most %d rows can be sent at once' % current_app.config['BULK_MAX_ROWS']}), 413
+    
+    results = [None] * len(entries)
+    valid = []
+    for index, item, error in entries:
+        row, error = bulk_row(item) if error is None else (None, error)
+        if error:
+            results[index] = {'index': index, 'status': 'error', 'error': error}
+        else:
+            valid.append((index, row))
+    
+    # Classify and insert one batch at a time, each in its own transaction
+    batch_size = current_app.config['BULK_BATCH_SIZE']
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        sentiments = analyze_sentiments([row['message'] for _, row in batch])
+        for (_, row), sentiment in zip(batch, sentiments):
+            row['sentiment'] = sentiment
+        try:
+            ids = db.session.scalars(
+                insert(Feedback).returning(Feedback.id, sort_by_parameter_order=True),
+                [row for _, row in batch]
+            ).all()
+            db.session.commit()
+        except SQLAlchemyError:
+            # Earlier batches are already committed, so report this one per
+            # row rather than failing the request and inviting a full replay
+            db.session.rollback()
+            current_app.logger.exception('Bulk insert of %d rows failed', len(batch))
+            for index, _ in batch:
+                results[index] = {'index': index, 'status': 'error', 'error': 'Could not be stored'}
+            continue
+        for (index, _), feedback_id in zip(batch, ids):
+            results[index] = {'index': index, 'status': 'created', 'id': feedback_id}
+    
+    created = [result['id'] for result in results if result['status'] == 'created']
+    if created:
+        data_changed('created', created)
+    
+    return jsonify({
+        'created': len(created),
+        'failed': len(entries) - len(created),
+        'results': results
+    })
+
+@main.route('/api/search', methods=['GET'])
+@replica_reads
+@conditional()
+def api_search():
+    search_query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', 20, type=int), current_app.config['ARCHIVE_MAX_PAGE_SIZE']))
+    
+    results = search_index.search(search_query, limit)
+    return jsonify([{
+        'id': row.id,
+        'name': row.name,
+        'category': row.category,
+        'sentiment': row.sentiment,
+        'submitted_at': row.submitted_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'snippet': str(search_index.highlight(row.snippet)),
+        'rank': row.rank
+    } for row in results])
+
+@main.route('/api/stats/timeseries', methods=['GET'])
+@replica_reads
+@conditional()
+def api_stats_timeseries():
+    try:
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else datetime.utcnow().date()
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+    
+    days = (end - start).days + 1
+    if days < 1:
+        return jsonify({'error': 'start must not be after end'}), 400
+    if days > current_app.config['TIMESERIES_MAX_DAYS']:
+        return jsonify({'error': 'At most %d days can be requested at once' % current_app.config['TIMESERIES_MAX_DAYS']}), 400
+    
+    category = request.args.get('category', '')
+    series = {}
+    for day, sentiment, count in timeseries_query(start, end, category).all():
+        series.setdefault(day, {})[sentiment] = count
+    
+    # Every day in the range is listed, including days without feedback
+    points = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        counts = series.get(day, {})
+        points.append({'date': day.isoformat(), 'total': sum(counts.values()), 'sentiment': counts})
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'category': category or None,
+        'total': sum(point['total'] for point in points),
+        'days': points
+    })
+
+@main.route('/api/sentiment/status', methods=['GET'])
+@admin_required
+def api_sentiment_status():
+    stats = sentiment_worker.stats()
+    stats['classifier'] = _classifier.stats() if _classifier is not None else None
+    return jsonify(stats)
+
+# Prometheus scrape target. Each process reports its own requests, so with
+# several workers every scrape sees one of them
+@main.route('/metrics')
+def metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), 'Bearer ' + token):
+        return Response('Unauthorized\n', 401, {'WWW-Authenticate': 'Bearer'}, mimetype='text/plain')
+    stats = sentiment_worker.stats()
+    gauges = [
+        ('feedback_sentiment_queue_depth', 'Feedback rows waiting for the sentiment worker.', stats['queue_depth']),
+        ('feedback_sentiment_lag_seconds', 'How long the oldest queued row has waited.', stats['lag_seconds'])
+    ]
+    if _classifier is not None:
+        classifier = _classifier.stats()
+        if 'hit_rate' in classifier:
+            gauges.append(('feedback_sentiment_cache_hit_rate', 'Share of messages labelled from the cache.',
+                           classifier['hit_rate']))
+    return Response(request_metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+# Queries issued by the routes, used to check their plans for full table scans
+def route_queries():
+    def filters(**values):
+        return dict({'category': '', 'date_start': '', 'date_end': '', 'search': ''}, **values)
+    
+    page_size = current_app.config['ARCHIVE_PAGE_SIZE']
+    cursor = (datetime.utcnow(), 1)
+    date_range = {'date_start': '2024-01-01', 'date_end': '2024-12-31'}
+    return [
+        ('archive', keyset_query(filter_feedback(preview_rows(), filters()), None, page_size)),
+        ('archive next page', keyset_query(filter_feedback(preview_rows(), filters()), cursor, page_size)),
+        ('archive by category', keyset_query(filter_feedback(preview_rows(), filters(category='Bug Report')), cursor, page_size)),
+        ('archive by date range', keyset_query(filter_feedback(preview_rows(), filters(**date_range)), cursor, page_size)),
+        ('archive by category and date range', keyset_query(
+            filter_feedback(preview_rows(), filters(category='Bug Report', **date_range)), cursor, page_size)),
+        ('archive search', keyset_query(filter_feedback(preview_rows(), filters(search='great visit')), None, page_size)),
+        ('admin dashboard', keyset_query(preview_rows(), cursor, current_app.config['ADMIN_PAGE_SIZE'])),
+        ('feedback detail', feedback_rows(*API_FIELDS.values()).filter(Feedback.id == 1)),
+        ('dashboard stats', feedback_stats.query()),
+        ('stats timeseries', timeseries_query(datetime(2024, 1, 1), datetime(2024, 12, 31))),
+        ('stats timeseries by category', timeseries_query(datetime(2024, 1, 1), datetime(2024, 12, 31), 'Complaint')),
+        ('export', export_query(filters())),
+        ('export by category', export_query(filters(category='Complaint'))),
+        ('api feedback', api_feedback_query(filters(), ['id', 'name', 'sentiment'], cursor, current_app.config['API_PAGE_SIZE'])),
+        ('api feedback updated since', api_feedback_query(
+            filters(), list(API_FIELDS), cursor, current_app.config['API_PAGE_SIZE'], updated_since=datetime(2024, 1, 1))),
+        ('sentiment backlog', unclassified_query()),
+        ('reclassify by category', reclassify_query(1000, datetime(2024, 1, 1), 'Complaint', 1000)),
+    ]
+
+# Run EXPLAIN QUERY PLAN over route_queries and collect any full table scans
+def explain_route_queries():
+    report = []
+    for name, query in route_queries():
+        sql = str(query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+        plan = [row[-1] for row in db.session.execute(text('EXPLAIN QUERY PLAN ' + sql))]
+        scans = [step for step in plan if re.match(r'SCAN (TABLE )?\w+$', step) and 'VIRTUAL TABLE' not in step]
+        report.append({'name': name, 'plan': plan, 'full_scans': scans})
+    return report
+
+# Existing rows in id order, for reclassifying after the classifier changes
+def reclassify_query(after_id, since=None, category=None, limit=None):
+    query = db.session.query(Feedback.id, Feedback.message, Feedback.sentiment).filter(Feedback.id > after_id)
+    if since is not None:
+        query = query.filter(Feedback.submitted_at >= since)
+    if category:
+        query = query.filter(Feedback.category == category)
+    return query.order_by(Feedback.id).limit(limit)
+
+def reclassify_chunks(after_id, since, category, chunk_size):
+    while True:
+        rows = reclassify_query(after_id, since, category, chunk_size).all()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1].id
+
+# Progress is saved after every committed chunk so an interrupted run can resume.
+# A checkpoint only applies to a run with the same filters and classifier version.
+def load_checkpoint(path, key):
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    return checkpoint['last_id'] if checkpoint.get('key') == key else 0
+
+def save_checkpoint(path, key, last_id):
+    with open(path + '.part', 'w') as f:
+        json.dump({'key': key, 'last_id': last_id, 'saved_at': datetime.utcnow().isoformat()}, f)
+    os.replace(path + '.part', path)
+
+def reclassify(since=None, category=None, dry_run=False, workers=1, chunk_size=1000, resume=True, progress=None):
+    checkpoint_path = current_app.config['RECLASSIFY_CHECKPOINT']
+    key = {
+        'classifier': get_classifier().version,
+        'since': since.isoformat() if since else None,
+        'category': category or None
+    }
+    after_id = load_checkpoint(checkpoint_path, key) if resume else 0
+    summary = {'resumed_from': after_id, 'scanned': 0, 'changed': 0, 'transitions': {}}
+    
+    def apply(rows, labels):
+        updates = []
+        for row, label in zip(rows, labels):
+            if row.sentiment != label:
+                updates.append({'b_id': row.id, 'b_sentiment': label})
+                transition = '%s -> %s' % (row.sentiment or 'Pending', label)
+                summary['transitions'][transition] = summary['transitions'].get(transition, 0) + 1
+        summary['scanned'] += len(rows)
+        summary['changed'] += len(updates)
+        if not dry_run:
+            if updates:
+                table = Feedback.__table__
+                db.session.execute(
+                    table.update().where(table.c.id == bindparam('b_id')).values(sentiment=bindparam('b_sentiment')),
+                    updates
+                )
+                db.session.commit()
+                data_changed('updated', [update['b_id'] for update in updates])
+            save_checkpoint(checkpoint_path, key, rows[-1].id)
+        if progress:
+            progress(summary, rows[-1].id)
+    
+    chunks = reclassify_chunks(after_id, since, category, chunk_size)
+    if workers <= 1:
+        for rows in chunks:
+            apply(rows, analyze_sentiments([row.message for row in rows]))
+        return summary
+    
+    # Chunks are scored in worker processes and committed in id order, with a
+    # few chunks in flight per worker so the database reads overlap the scoring
+    with ProcessPoolExecutor(
+        workers, initializer=init_worker, initargs=(current_app.config['SENTIMENT_CLASSIFIER'],)
+    ) as pool:
+        in_flight = deque()
+        for rows in chunks:
+            in_flight.append((rows, pool.submit(classify_in_worker, [row.message for row in rows])))
+            if len(in_flight) >= workers * 2:
+                rows, future = in_flight.popleft()
+                apply(rows, future.result())
+        while in_flight:
+            rows, future = in_flight.popleft()
+            apply(rows, future.result())
+    return summary
+
+# Bulk load synthetic feedback (see synthetic.py). On SQLite the feedback
+# triggers are dropped for the load and recreated in the same transaction;
+# the search index, daily stats and data version are then updated for all
+# new rows at once instead of row by row. Each distinct message is
+# classified once, and a pending fraction of rows is left for the worker.
+def seed_feedback(rows, seed=0, days=365, end=None, pending=0.0, batch_size=50000, progress=None):
+    table = Feedback.__table__
+    generated = synthetic.generate(rows, seed, days, end)
+    # Separate from the generator's random state, so pending doesn't change the rows
+    pending_rng = random.Random(seed)
+    labels = {}
+    inserted = 0
+    with db.engine.begin() as connection:
+        sqlite = connection.dialect.name == 'sqlite'
+        triggers = []
+        if sqlite:
+            # pysqlite only opens a transaction before DML, so without this each
+            # DROP TRIGGER would commit on its own and an interrupted seed would
+            # leave feedback without its search, rollup and version triggers
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+            triggers = connection.exec_driver_sql(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'feedback'"
+            ).all()
+            for name, _ in triggers:
+                connection.exec_driver_sql('DROP TRIGGER "%s"' % name)
+        first_id = (connection.execute(db.select(func.max(table.c.id))).scalar() or 0) + 1
+
+        while True:
+            batch = list(islice(generated, batch_size))
+            if not batch:
+                break
+            new = list({message for _, _, _, message, _ in batch if message not in labels})
+            if new:
+                labels.update(zip(new, analyze_sentiments(new)))
+            values = [(
+                name, email, category, message,
+                None if pending and pending_rng.random() < pending else labels[message],
+                submitted_at
+            ) for name, email, category, message, submitted_at in batch]
+            if sqlite:
+                # Plain tuples straight to the driver, skipping per-row type
+                # processing; timestamps in the format SQLAlchemy writes
+                connection.exec_driver_sql(
+                    'INSERT INTO feedback (name, email, category, message, sentiment, submitted_at, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [row[:5] + (row[5].isoformat(' ', 'microseconds'),) * 2 for row in values]
+                )
+            else:
+                connection.execute(table.insert(), [{
+                    'name': name, 'email': email, 'category': category, 'message': message,
+                    'sentiment': sentiment, 'submitted_at': submitted_at, 'updated_at': submitted_at
+                } for name, email, category, message, sentiment, submitted_at in values])
+            inserted += len(batch)
+            if progress:
+                progress(inserted)
+
+        if sqlite:
+            for _, sql in triggers:
+                connection.exec_driver_sql(sql)
+            if any(name == 'feedback_fts_insert' for name, _ in triggers):
+                connection.execute(text(
+                    "INSERT INTO feedback_fts(rowid, name, message, email) "
+                    "SELECT id, name, message, email FROM feedback WHERE id >= :first_id"
+                ), {'first_id': first_id})
+            connection.execute(text(
+                "INSERT INTO feedback_daily_stats (day, category, sentiment, count) "
+                "SELECT date(submitted_at), category, coalesce(sentiment, 'Pending'), count(*) FROM feedback "
+                "WHERE id >= :first_id AND submitted_at IS NOT NULL GROUP BY 1, 2, 3 "
+                "ON CONFLICT (day, category, sentiment) DO UPDATE SET count = count + excluded.count"
+            ), {'first_id': first_id})
+            connection.execute(text(
+                "UPDATE feedback_version SET version = version + 1, changed_at = %s WHERE id = 1" % migrations.SQLITE_NOW
+            ))
+    data_changed()
+    return inserted
+
+feedback_cli = AppGroup('feedback', help='Feedback database maintenance commands.')
+
+@feedback_cli.command('init')
+def init_command():
+    """Create or upgrade the database and seed the default admin user."""
+    for version, description in init_database():
+        click.echo('Applied %d: %s' % (version, description))
+    click.echo('Database is ready')
+
+@feedback_cli.command('migrate')
+@click.option('--target', type=int, default=None, help='Stop after this migration version.')
+def migrate_command(target):
+    """Upgrade the database schema in place."""
+    with startup_lock(current_app):
+        applied = migrations.upgrade(db.engine, target)
+    for version, description in applied:
+        click.echo('Applied %d: %s' % (version, description))
+    with db.engine.connect() as connection:
+        click.echo('Schema is at version %d' % migrations.current_version(connection))
+
+@feedback_cli.command('explain')
+@click.option('--verbose', is_flag=True, help='Print the full plan for every query.')
+def explain_command(verbose):
+    """Report route queries whose plans scan a whole table."""
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('EXPLAIN QUERY PLAN checks are only supported on SQLite')
+    
+    report = explain_route_queries()
+    for entry in report:
+        status = 'FULL SCAN' if entry['full_scans'] else 'ok'
+        click.echo('%-40s %s' % (entry['name'], status))
+        if verbose or entry['full_scans']:
+            for step in entry['plan']:
+                click.echo('    ' + step)
+    
+    if any(entry['full_scans'] for entry in report):
+        raise SystemExit(1)
+
+@feedback_cli.command('reclassify')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Only rows submitted on or after this date (YYYY-MM-DD).')
+@click.option('--category', type=click.Choice(CATEGORIES), default=None, help='Only rows in this category.')
+@click.option('--dry-run', is_flag=True, help='Report what would change without writing anything.')
+@click.option('--workers', type=int, default=os.cpu_count() or 1, show_default=True,
+              help='Processes used to score messages.')
+@click.option('--chunk-size', type=int, default=1000, show_default=True, help='Rows per id range and transaction.')
+@click.option('--restart', is_flag=True, help='Ignore any saved checkpoint and start from the first row.')
+def reclassify_command(since, category, dry_run, workers, chunk_size, restart):
+    """Recompute stored sentiment with the current classifier."""
+    def progress(summary, last_id):
+        click.echo('Scanned %d rows up to id %d, %d changed' % (summary['scanned'], last_id, summary['changed']))
+    
+    summary = reclassify(since, category, dry_run, max(1, workers), chunk_size, not restart, progress)
+    if summary['resumed_from']:
+        click.echo('Resumed after id %d' % summary['resumed_from'])
+    for transition, count in sorted(summary['transitions'].items()):
+        click.echo('    %-24s %d' % (transition, count))
+    click.echo('%s %d of %d rows' % (
+        'Would change' if dry_run else 'Changed', summary['changed'], summary['scanned']))
+
+@feedback_cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recount the daily statistics rollup from the feedback table."""
+    rows = rebuild_daily_stats()
+    click.echo('Rebuilt feedback_daily_stats: %d rows' % rows)
+
+@feedback_cli.command('seed')
+@click.option('--rows', type=int, default=100000, show_default=True, help='Number of feedback rows to add.')
+@click.option('--seed', 'seed_value', type=int, default=0, show_default=True,
+              help='Random seed; the same seed, rows and dates give the same data.')
+@click.option('--days', type=int, default=365, show_default=True, help='Spread the rows over this many days.')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Day after the last generated row (YYYY-MM-DD); defaults to today.')
+@click.option('--pending', type=click.FloatRange(0, 1), default=0.0, show_default=True,
+              help='Fraction of rows left unclassified for the sentiment worker.')
+def seed_command(rows, seed_value, days, end, pending):
+    """Add synthetic feedback for local testing at production scale."""
+    start = time.time()
+    
+    def progress(inserted):
+        click.echo('Inserted %d of %d rows' % (inserted, rows))
+    
+    inserted = seed_feedback(rows, seed_value, days, end, pending, progress=progress)
+    click.echo('Seeded %d rows in %.1fs' % (inserted, time.time() - start))
+
+# Application factory. Building an app only reads configuration; setting up
+# the database is a separate, explicit step (init_database). instance_path
+# relocates the instance folder (instance/config.py, the generated secret key,
+# caches and exports), e.g. to a temporary directory in tests.
+def create_app(config=None, instance_path=None):
+    app = Flask(__name__, instance_path=instance_path)
+    # Loaded from the deployment config, or shared by all workers through a key
+    # file in the instance folder (see load_secret_key)
+    app.config['SECRET_KEY'] = None
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///feedback.db'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # Optional read-only database for the listing, search, stats and export
+    # views (see replica_reads). It may lag the primary; when None every
+    # query uses SQLALCHEMY_DATABASE_URI
+    app.config['DATABASE_REPLICA_URI'] = None
+
+    # SQLite connection profile (see SQLITE_PROFILES); SQLITE_PRAGMAS adds to
+    # or overrides individual pragmas of the chosen profile
+    app.config['SQLITE_PROFILE'] = 'tuned'
+    app.config['SQLITE_PRAGMAS'] = {}
+
+    # Connections pooled per worker process. Each request thread holds one
+    # while it runs, so the pool matches gunicorn's default thread count, with
+    # some overflow for the sentiment and export workers
+    app.config['DATABASE_POOL_SIZE'] = 8
+    app.config['DATABASE_POOL_OVERFLOW'] = 4
+    app.config['DATABASE_POOL_TIMEOUT'] = 10
+
+    # Compiled templates are cached on disk so workers skip parsing on startup
+    app.config['TEMPLATE_CACHE_DIR'] = os.path.join(app.instance_path, 'jinja_cache')
+
+    # Password given to the default admin account when it is first created
+    app.config['ADMIN_PASSWORD'] = 'admin123'
+
+    # Sentiment analysis runs in a background worker pool unless disabled
+    app.config['SENTIMENT_ASYNC'] = True
+    app.config['SENTIMENT_WORKERS'] = 2
+    app.config['SENTIMENT_BATCH_SIZE'] = 50
+
+    # Dotted path to the SentimentClassifier used for new and backfilled rows
+    app.config['SENTIMENT_CLASSIFIER'] = 'sentiment.PatternClassifier'
+
+    # Labels for repeated messages are cached by message hash; set the size to 0
+    # to disable the cache, or the path to None to keep it in memory only
+    app.config['SENTIMENT_CACHE_SIZE'] = 10000
+    app.config['SENTIMENT_CACHE_TTL'] = None
+    app.config['SENTIMENT_CACHE_PATH'] = os.path.join(app.instance_path, 'sentiment_cache.db')
+
+    # Progress of `flask feedback reclassify`, so an interrupted run can resume
+    app.config['RECLASSIFY_CHECKPOINT'] = os.path.join(app.instance_path, 'reclassify.json')
+
+    # Archive pagination
+    app.config['ARCHIVE_PAGE_SIZE'] = 50
+    app.config['ARCHIVE_MAX_PAGE_SIZE'] = 200
+    app.config['ADMIN_PAGE_SIZE'] = 100
+    app.config['API_PAGE_SIZE'] = 100
+    app.config['API_MAX_PAGE_SIZE'] = 1000
+
+    # Characters of each message shown in the archive and dashboard lists;
+    # the full text is fetched from /api/feedback/<id> when asked for
+    app.config['MESSAGE_PREVIEW_LENGTH'] = 200
+
+    # How long a reverse proxy may serve public archive pages without revalidating
+    app.config['ARCHIVE_CACHE_SECONDS'] = 60
+
+    # Bulk ingestion limits. Bodies are read whole before rows are counted, so
+    # request size is capped too (larger requests get a 413)
+    app.config['BULK_MAX_ROWS'] = 10000
+    app.config['BULK_BATCH_SIZE'] = 500
+    app.config['MAX_CONTENT_LENGTH'] = 32 * 1024 * 1024
+
+    # Dashboard statistics are cached and invalidated on every write
+    app.config['STATS_CACHE_SECONDS'] = 300
+
+    # Live dashboard feed: heartbeat interval, events kept for reconnecting
+    # clients, and how far a client may fall behind before it is told to reload
+    app.config['EVENTS_HEARTBEAT_SECONDS'] = 15
+    app.config['EVENTS_REPLAY_SIZE'] = 500
+    app.config['EVENTS_QUEUE_SIZE'] = 1000
+    # Each open stream holds one of the worker's GUNICORN_THREADS threads for
+    # as long as the tab stays open; further streams get a 503
+    app.config['EVENTS_MAX_STREAMS'] = 4
+
+    # Longest date range /api/stats/timeseries serves in one request
+    app.config['TIMESERIES_MAX_DAYS'] = 3660
+
+    # Request timings, query and row counts served as Prometheus text on
+    # /metrics, which requires "Authorization: Bearer <METRICS_TOKEN>" when a
+    # token is set. Long-lived streams are left out of the timings
+    app.config['METRICS_ENABLED'] = True
+    app.config['METRICS_TOKEN'] = None
+    app.config['METRICS_SKIP_ENDPOINTS'] = ['main.admin_events']
+
+    # Opt-in sampling profiler: running requests' stacks are sampled every
+    # PROFILE_INTERVAL seconds, and the PROFILE_KEEP slowest requests are kept
+    # as collapsed stacks (flamegraph.pl / speedscope input) in PROFILE_DIR
+    app.config['PROFILE_SAMPLING'] = False
+    app.config['PROFILE_INTERVAL'] = 0.005
+    app.config['PROFILE_KEEP'] = 20
+    app.config['PROFILE_DIR'] = os.path.join(app.instance_path, 'profiles')
+
+    # Rows fetched per round trip while streaming exports
+    app.config['EXPORT_BATCH_SIZE'] = 1000
+
+    # PDF exports run as background jobs and are cached on disk
+    app.config['EXPORT_WORKERS'] = 2
+    app.config['EXPORT_CACHE_SIZE'] = 20
+
+    # Deployment overrides, applied over the defaults above in this order:
+    #   instance/config.py, the Python file named by FEEDBACK_SETTINGS,
+    #   FEEDBACK_<KEY> environment variables (values are parsed as JSON when
+    #   possible), and finally the config passed in
+    app.config.from_pyfile(os.path.join(app.instance_path, 'config.py'), silent=True)
+    app.config.from_envvar('FEEDBACK_SETTINGS', silent=True)
+    app.config.from_prefixed_env('FEEDBACK')
+    app.config.update(config or {})
+
+    os.makedirs(app.config['TEMPLATE_CACHE_DIR'], exist_ok=True)
+    app.jinja_options = dict(app.jinja_options, bytecode_cache=FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_DIR']))
+
+    if not app.config['SECRET_KEY']:
+        with startup_lock(app):
+            app.config['SECRET_KEY'] = load_secret_key(app)
+    
+    # Options set in SQLALCHEMY_ENGINE_OPTIONS win over these
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(
+        engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    if app.config['DATABASE_REPLICA_URI']:
+        app.config['SQLALCHEMY_BINDS'] = dict(app.config.get('SQLALCHEMY_BINDS') or {}, replica=dict(
+            engine_options(app.config['DATABASE_REPLICA_URI'], app.config), url=app.config['DATABASE_REPLICA_URI']))
+    db.init_app(app)
+    with app.app_context():
+        for key, engine in db.engines.items():
+            pragmas = sqlite_pragmas(app.config)
+            if key == 'replica':
+                # A write that reaches the replica is a routing bug; fail loudly
+                pragmas['query_only'] = 1
+            configure_sqlite(engine, pragmas)
+            if app.config['METRICS_ENABLED']:
+                request_metrics.instrument_engine(engine)
+    request_metrics.init_app(app)
+    sentiment_worker.init_app(app)
+    feedback_stats.init_app(app)
+    feedback_events.init_app(app)
+    export_jobs.init_app(app)
+    app.register_blueprint(main)
+    app.cli.add_command(feedback_cli)
+    return app
+
+# Run the development server; see wsgi.py for production
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app = create_app()
+    with app.app_context():
+        init_database()
+    if app.config['SENTIMENT_ASYNC']:
+        sentiment_worker.start()
+    app.run(debug=True)
@@ -0,0 +1,125 @@
+# Mixed read/write throughput under the SQLite connection profiles.
+#
+# Several processes (like gunicorn workers), each with a few threads, submit
+# feedback and read the archive and the API against one database file for a
+# fixed time. "default" is SQLite's own settings with SQLAlchemy's default
+# pool, which is what the app used before SQLITE_PROFILE existed; "tuned" is
+# the shipped configuration. Each profile gets a fresh copy of the same
+# seeded database.
+#
+#   python benchmarks/bench_concurrency.py [seconds] [processes] [threads] [write share]
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, init_database, db, Feedback, CATEGORIES  # noqa: E402
+
+PROFILES = {
+    'default': {'SQLITE_PROFILE': 'default', 'DATABASE_POOL_SIZE': 5, 'DATABASE_POOL_OVERFLOW': 10,
+                'DATABASE_POOL_TIMEOUT': 30},
+    'tuned': {}
+}
+
+READS = ['/archive', '/api/feedback?page_size=50', '/archive?category=Complaint']
+
+
+def config(path, profile):
+    return dict(PROFILES[profile], SQLALCHEMY_DATABASE_URI='sqlite:///' + path, SECRET_KEY='bench',
+                SENTIMENT_CACHE_PATH=None)
+
+
+def instance_path(path):
+    # Next to the database, so runs leave the repository's instance folder alone
+    return os.path.join(os.path.dirname(path), 'instance')
+
+
+def seed(path, rows):
+    app = create_app(config(path, 'default'), instance_path=instance_path(path))
+    rng = random.Random(19)
+    now = datetime.utcnow()
+    with app.app_context():
+        init_database()
+        db.session.execute(Feedback.__table__.insert(), [{
+            'name': 'Visitor %d' % i, 'email': None, 'category': rng.choice(CATEGORIES),
+            'message': 'Seeded message %d about the visit.' % i, 'sentiment': 'Neutral',
+            'submitted_at': now
+        } for i in range(rows)])
+        db.session.commit()
+        db.engine.dispose()
+
+
+def worker(args):
+    path, profile, seconds, threads, write_share, seed_value = args
+    app = create_app(config(path, profile), instance_path=instance_path(path))
+    deadline = time.perf_counter() + seconds
+    totals = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def run(index):
+        rng = random.Random(seed_value * 100 + index)
+        client = app.test_client()
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        while time.perf_counter() < deadline:
+            if rng.random() < write_share:
+                response = client.post('/submit', data={
+                    'name': 'Load %d' % index, 'category': rng.choice(CATEGORIES),
+                    'message': 'The exhibit was wonderful, visit %d.' % counts['writes']})
+                kind, ok = 'writes', response.status_code == 302
+            else:
+                response = client.get(rng.choice(READS))
+                kind, ok = 'reads', response.status_code == 200
+            counts[kind if ok else 'errors'] += 1
+        with lock:
+            for key, value in counts.items():
+                totals[key] += value
+
+    pool = [threading.Thread(target=run, args=(index,)) for index in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return totals
+
+
+def measure(template, profile, seconds, processes, threads, write_share):
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'feedback.db')
+        shutil.copy(template, path)
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(worker, [(path, profile, seconds, threads, write_share, i) for i in range(processes)])
+        return {key: sum(result[key] for result in results) for key in results[0]}
+    finally:
+        shutil.rmtree(directory)
+
+
+def main(seconds, processes, threads, write_share):
+    directory = tempfile.mkdtemp()
+    try:
+        template = os.path.join(directory, 'template.db')
+        seed(template, 5000)
+        print('%d processes x %d threads, %d%% writes, %ss per profile' % (
+            processes, threads, write_share * 100, seconds))
+        print('%-10s %10s %10s %10s %10s' % ('', 'reads/s', 'writes/s', 'total/s', 'errors'))
+        for profile in PROFILES:
+            counts = measure(template, profile, seconds, processes, threads, write_share)
+            print('%-10s %10.0f %10.0f %10.0f %10d' % (
+                profile, counts['reads'] / seconds, counts['writes'] / seconds,
+                (counts['reads'] + counts['writes']) / seconds, counts['errors']))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 10,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+         int(sys.argv[3]) if len(sys.argv) > 3 else 4,
+         float(sys.argv[4]) if len(sys.argv) > 4 else 0.2)
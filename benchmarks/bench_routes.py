@@ -0,0 +1,250 @@
+# Route latency, memory and classifier throughput at several table sizes.
+#
+# For each size, a fresh database is seeded with synthetic feedback and
+# every route below is requested through the test client. Latency
+# percentiles come from timed runs; peak Python allocation (tracemalloc)
+# comes from a separate run so that tracing doesn't skew the timings. PDF
+# exports are timed until their background job finishes. Results are
+# written as JSON, and with --baseline they are compared against an earlier
+# run: the script exits with status 1 when anything is slower or larger
+# than the tolerance allows.
+#
+#   python benchmarks/bench_routes.py [--sizes 10000,100000,1000000] [--requests 30]
+#       [--output results.json] [--baseline baseline.json] [--tolerance 0.5]
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, init_database, db, seed_feedback, CATEGORIES, export_jobs, feedback_filters  # noqa: E402
+from sentiment import load_classifier  # noqa: E402
+
+# name, method, path, needs an admin session, heavy (fewer requests)
+ROUTES = [
+    ('archive', 'GET', '/archive', False, False),
+    ('archive_category', 'GET', '/archive?category=Complaint', False, False),
+    ('archive_dates', 'GET', '/archive?date_start=2024-03-01&date_end=2024-03-31', False, False),
+    ('archive_search', 'GET', '/archive?search=guide', False, False),
+    ('admin', 'GET', '/admin', True, False),
+    ('api_feedback', 'GET', '/api/feedback?page_size=100', False, False),
+    ('export_csv', 'GET', '/export/csv', True, True),
+    ('export_pdf', 'GET', '/export/pdf?date_end=%s', True, True),
+    # Last, since every submission invalidates the caches the reads use
+    ('submit', 'POST', '/submit', False, False),
+]
+
+# Regressions smaller than these are treated as noise
+FLOORS = {'p50_ms': 5.0, 'p95_ms': 10.0, 'peak_alloc_kb': 256}
+
+OPENINGS = ['The', 'Our', 'My', 'This']
+SUBJECTS = ['exhibit', 'guide', 'cafe', 'parking', 'gift shop', 'audio tour', 'staff']
+VERDICTS = ['was wonderful', 'was not very good', 'was okay', 'was terribly crowded', 'could be better',
+            'was really helpful', 'was confusing', 'exceeded expectations']
+
+
+def seed(path, rows):
+    # The rows "flask feedback seed" would add, spread over 2024
+    app = create_app(config(path), instance_path=instance_path(path))
+    with app.app_context():
+        init_database()
+        seed_feedback(rows, seed=22, days=366, end=datetime(2025, 1, 1))
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def config(path):
+    return {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + path, 'SECRET_KEY': 'bench', 'SENTIMENT_CACHE_PATH': None}
+
+
+def instance_path(path):
+    # Next to the database, so runs leave the repository's instance folder alone
+    return os.path.join(os.path.dirname(path), 'instance')
+
+
+def request_once(app, client, route, iteration):
+    name, method, path, _, _ = route
+    if name == 'export_pdf':
+        # A new date_end each time, so every request builds a new PDF
+        end = (datetime(2100, 1, 1) + timedelta(days=iteration)).strftime('%Y-%m-%d')
+        response = client.get(path % end)
+        with app.test_request_context(path % end):
+            job = export_jobs.submit(feedback_filters())
+        if 'future' in job:
+            job['future'].result()
+        return response.status_code
+    if method == 'POST':
+        response = client.post(path, data={
+            'name': 'Bench %d' % iteration, 'category': CATEGORIES[iteration % len(CATEGORIES)],
+            'message': 'The audio tour was wonderful, visit %d.' % iteration})
+    else:
+        response = client.get(path)
+    response.get_data()
+    response.close()
+    return response.status_code
+
+
+def percentiles(samples):
+    ms = [sample * 1000 for sample in samples]
+    if len(ms) == 1:
+        p50 = p95 = p99 = ms[0]
+    else:
+        cuts = statistics.quantiles(ms, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    return {'requests': len(ms), 'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3), 'p99_ms': round(p99, 3),
+            'mean_ms': round(statistics.fmean(ms), 3), 'max_ms': round(max(ms), 3)}
+
+
+def measure_routes(path, requests, heavy_requests):
+    app = create_app(config(path), instance_path=instance_path(path))
+    results = {}
+    iteration = 0
+    visitor, admin = app.test_client(), app.test_client()
+    with admin.session_transaction() as sess:
+        sess['logged_in'] = True
+        sess['username'] = 'admin'
+    for route in ROUTES:
+        name, _, _, needs_admin, heavy = route
+        client = admin if needs_admin else visitor
+        count = heavy_requests if heavy else requests
+        # Warm up caches and compiled templates before timing
+        status = request_once(app, client, route, iteration)
+        iteration += 1
+        if status not in (200, 302):
+            raise RuntimeError('%s returned %d' % (name, status))
+
+        samples = []
+        for _ in range(count):
+            start = time.perf_counter()
+            request_once(app, client, route, iteration)
+            samples.append(time.perf_counter() - start)
+            iteration += 1
+
+        tracemalloc.start()
+        request_once(app, client, route, iteration)
+        iteration += 1
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = dict(percentiles(samples), peak_alloc_kb=peak // 1024)
+        print('  %-18s p50 %9.2f ms   p95 %9.2f ms   peak %8d KB' % (
+            name, results[name]['p50_ms'], results[name]['p95_ms'], results[name]['peak_alloc_kb']))
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    return results
+
+
+def measure_sentiment(app, count):
+    rng = random.Random(12)
+    messages = ['%s %s %s (visit %d)' % (rng.choice(OPENINGS), rng.choice(SUBJECTS), rng.choice(VERDICTS), i)
+                for i in range(count)]
+    classifier = load_classifier(app.config['SENTIMENT_CLASSIFIER'])
+    classifier.classify(['warm up'])
+    start = time.perf_counter()
+    for offset in range(0, count, app.config['SENTIMENT_BATCH_SIZE']):
+        classifier.classify(messages[offset:offset + app.config['SENTIMENT_BATCH_SIZE']])
+    return {'messages': count, 'messages_per_second': round(count / (time.perf_counter() - start), 1)}
+
+
+def compare(results, baseline, tolerance):
+    # Returns a list of human-readable regressions
+    regressions = []
+    for size, current in results['sizes'].items():
+        previous = baseline.get('sizes', {}).get(size)
+        if not previous:
+            continue
+        for route, metrics in current['routes'].items():
+            before = previous['routes'].get(route)
+            if not before:
+                continue
+            for metric, floor in FLOORS.items():
+                old, new = before.get(metric), metrics.get(metric)
+                if old is None or new is None:
+                    continue
+                if new > old * (1 + tolerance) and new - old > floor:
+                    regressions.append('%s rows, %s: %s %.1f -> %.1f (+%.0f%%)' % (
+                        size, route, metric, old, new, (new / old - 1) * 100 if old else float('inf')))
+    old_rate = baseline.get('sentiment', {}).get('messages_per_second')
+    new_rate = results['sentiment']['messages_per_second']
+    if old_rate and new_rate < old_rate / (1 + tolerance):
+        regressions.append('sentiment: messages_per_second %.0f -> %.0f' % (old_rate, new_rate))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='10000,100000', help='Comma-separated row counts (e.g. 10000,100000,1000000).')
+    parser.add_argument('--requests', type=int, default=30, help='Timed requests per route.')
+    parser.add_argument('--heavy-requests', type=int, default=3, help='Timed requests per export route.')
+    parser.add_argument('--messages', type=int, default=5000, help='Messages for the classifier throughput run.')
+    parser.add_argument('--output', default='bench_routes.json', help='Where to write the JSON results.')
+    parser.add_argument('--baseline', help='Earlier results to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed slowdown or growth, as a fraction.')
+    args = parser.parse_args()
+
+    results = {
+        'meta': {
+            'created_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'requests': args.requests,
+            'heavy_requests': args.heavy_requests
+        },
+        'sizes': {}
+    }
+    directory = tempfile.mkdtemp()
+    try:
+        for size in [int(size) for size in args.sizes.split(',')]:
+            path = os.path.join(directory, 'feedback-%d.db' % size)
+            print('%d rows' % size)
+            start = time.perf_counter()
+            seed(path, size)
+            seed_seconds = time.perf_counter() - start
+            print('  seeded in %.1fs' % seed_seconds)
+            results['sizes'][str(size)] = {
+                'seed_seconds': round(seed_seconds, 2),
+                'routes': measure_routes(path, args.requests, args.heavy_requests),
+                'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+            }
+            os.remove(path)
+
+        results['sentiment'] = measure_sentiment(
+            create_app({'SECRET_KEY': 'bench'}, instance_path=os.path.join(directory, 'instance')), args.messages)
+    finally:
+        shutil.rmtree(directory)
+    print('sentiment: %.0f messages/s' % results['sentiment']['messages_per_second'])
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print('wrote %s' % args.output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        if regressions:
+            sys.exit(1)
+        print('no regressions against %s (tolerance %d%%)' % (args.baseline, args.tolerance * 100))
+
+
+if __name__ == '__main__':
+    main()
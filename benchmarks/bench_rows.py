@@ -0,0 +1,87 @@
+# Cost of loading listing rows: ORM instances versus projected Row tuples.
+#
+# "orm" is how the archive and dashboard loaded a page before: Feedback
+# instances, each registered in the session's identity map with its change
+# tracking state. "rows" is feedback_rows(), which every listing and export
+# route now uses. Both load the same newest-first rows from a seeded
+# database; the time is the median of several runs, each in a fresh session
+# like a request, and the allocation is tracemalloc's peak while loading.
+#
+#   python benchmarks/bench_rows.py [table rows] [runs]
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, init_database, db, Feedback, feedback_rows, seed_feedback  # noqa: E402
+
+# Rows loaded per measurement: an archive page, a dashboard page, an export
+BATCHES = [20, 50, 10000]
+
+LOADERS = {
+    'orm': lambda: Feedback.query,
+    'rows': lambda: feedback_rows()
+}
+
+
+def load(make_query, limit):
+    query = make_query().order_by(Feedback.submitted_at.desc(), Feedback.id.desc()).limit(limit)
+    rows = query.all()
+    # Read every column, as the templates and exports do
+    for row in rows:
+        (row.id, row.name, row.email, row.category, row.message, row.sentiment, row.submitted_at)
+    return rows
+
+
+def measure(make_query, limit, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        load(make_query, limit)
+        samples.append(time.perf_counter() - start)
+        db.session.remove()
+
+    tracemalloc.start()
+    rows = load(make_query, limit)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    count = len(rows)
+    del rows
+    db.session.remove()
+    return count, statistics.median(samples), peak
+
+
+def main(table_rows, runs):
+    directory = tempfile.mkdtemp()
+    try:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(directory, 'feedback.db'),
+                          'SECRET_KEY': 'bench', 'SENTIMENT_CACHE_PATH': None, 'METRICS_ENABLED': False},
+                         instance_path=os.path.join(directory, 'instance'))
+        with app.app_context():
+            init_database()
+            seed_feedback(table_rows, seed=24, end=datetime(2025, 1, 1))
+            # Warm up the statement caches
+            for make_query in LOADERS.values():
+                measure(make_query, 10, 1)
+
+            print('%-8s %-6s %12s %14s %16s' % ('rows', '', 'load ms', 'us per row', 'bytes per row'))
+            for limit in BATCHES:
+                results = {}
+                for name, make_query in LOADERS.items():
+                    count, seconds, peak = measure(make_query, limit, runs)
+                    results[name] = seconds
+                    print('%-8d %-6s %12.2f %14.2f %16d' % (count, name, seconds * 1000, seconds / count * 1e6, peak // count))
+                print('%-8s speedup %.1fx' % ('', results['orm'] / results['rows']))
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000, int(sys.argv[2]) if len(sys.argv) > 2 else 20)
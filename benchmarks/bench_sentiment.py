@@ -0,0 +1,73 @@
+# Sentiment classification throughput, in messages per second.
+#
+# "textblob" is the old analyze_sentiment, which built a TextBlob per message
+# and computed its polarity up to twice; "classifier" is the configured
+# SentimentClassifier scoring the same messages in batches.
+#
+#   python benchmarks/bench_sentiment.py [messages] [batch size]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textblob import TextBlob  # noqa: E402
+from app import create_app, CATEGORIES  # noqa: E402
+from sentiment import load_classifier  # noqa: E402
+
+app = create_app()
+
+OPENINGS = ['The', 'Our', 'My', 'This']
+SUBJECTS = ['exhibit', 'guide', 'cafe', 'parking', 'gift shop', 'audio tour', 'staff']
+VERDICTS = ['was wonderful', 'was not very good', 'was okay', 'was terribly crowded', 'could be better',
+            'was really helpful', 'was confusing', 'exceeded expectations']
+ENDINGS = ['.', '!', '!!!', ' :)', ' :(', '. Thanks.']
+
+
+def textblob_sentiment(text):
+    analysis = TextBlob(text)
+    if analysis.sentiment.polarity > 0.1:
+        return "Positive"
+    elif analysis.sentiment.polarity < -0.1:
+        return "Negative"
+    else:
+        return "Neutral"
+
+
+def sample_messages(count):
+    rng = random.Random(12)
+    return ['%s %s %s%s (%s visit %d)' % (
+        rng.choice(OPENINGS), rng.choice(SUBJECTS), rng.choice(VERDICTS), rng.choice(ENDINGS),
+        rng.choice(CATEGORIES), i
+    ) for i in range(count)]
+
+
+def throughput(classify, messages):
+    start = time.perf_counter()
+    labels = classify(messages)
+    return len(messages) / (time.perf_counter() - start), labels
+
+
+def main(count, batch_size):
+    messages = sample_messages(count)
+    classifier = load_classifier(app.config['SENTIMENT_CLASSIFIER'])
+    # Load both lexicons before timing
+    textblob_sentiment('warm up')
+    classifier.classify(['warm up'])
+
+    before, expected = throughput(lambda texts: [textblob_sentiment(text) for text in texts], messages)
+    after, labels = throughput(lambda texts: [
+        result for start in range(0, len(texts), batch_size)
+        for result in classifier.classify(texts[start:start + batch_size])
+    ], messages)
+
+    print('%-12s %14s' % ('', 'messages/s'))
+    print('%-12s %14.0f' % ('textblob', before))
+    print('%-12s %14.0f' % ('classifier', after))
+    print('speedup %.1fx, %d of %d labels differ' % (
+        after / before, sum(a != b for a, b in zip(expected, labels)), len(labels)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000, int(sys.argv[2]) if len(sys.argv) > 2 else 500)
@@ -0,0 +1,64 @@
+# Time from a cold interpreter to the first served request.
+#
+# Each run starts a fresh Python process that imports the app module, builds
+# the app with create_app and serves its first requests through the test
+# client. The first archive request also opens the database. TextBlob is
+# timed on its own for reference; the app only imports it once a message
+# is classified.
+#
+#   python benchmarks/bench_startup.py [runs]
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, time
+start = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+app = module.create_app()
+created = time.perf_counter()
+client = app.test_client()
+assert client.get('/').status_code == 200
+first_request = time.perf_counter()
+assert client.get('/archive').status_code == 200
+first_query = time.perf_counter()
+print(json.dumps({
+    'import': imported - start,
+    'create_app': created - imported,
+    'first request (/)': first_request - created,
+    'first query (/archive)': first_query - first_request,
+    'import to first request': first_request - start,
+}))
+'''
+
+TEXTBLOB_PROBE = '''
+import json, time
+start = time.perf_counter()
+from textblob import en
+len(en.sentiment)
+print(json.dumps({'textblob import and lexicon load': time.perf_counter() - start}))
+'''
+
+
+def run(probe):
+    output = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs):
+    results = [run(PROBE) for _ in range(runs)]
+    results = [dict(result, **run(TEXTBLOB_PROBE)) for result in results]
+
+    print('%-34s %10s %10s' % ('phase (%d runs)' % runs, 'median ms', 'max ms'))
+    for phase in results[0]:
+        values = [result[phase] * 1000 for result in results]
+        print('%-34s %10.1f %10.1f' % (phase, statistics.median(values), max(values)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
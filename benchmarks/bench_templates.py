@@ -0,0 +1,73 @@
+# Per-route template render time, before and after moving to the loader.
+#
+# "source" compiles the template from its source on every call, which is
+# what render_template_string did for the old inline templates; "loader"
+# goes through render_template and the compiled template cache.
+#
+#   python benchmarks/bench_templates.py [iterations]
+import os
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import render_template, render_template_string  # noqa: E402
+from app import create_app, CATEGORIES  # noqa: E402
+
+app = create_app()
+
+
+def sample_feedback(count):
+    return [SimpleNamespace(
+        id=i, name='Visitor %d' % i, email='visitor%d@example.com' % i, category=CATEGORIES[i % len(CATEGORIES)],
+        message='Sample feedback message number %d with a little detail.' % i,
+        sentiment=['Positive', 'Neutral', 'Negative'][i % 3], submitted_at=datetime(2025, 1, 1, 12, 0)
+    ) for i in range(count)]
+
+
+def contexts():
+    rows = sample_feedback(app.config['ARCHIVE_PAGE_SIZE'])
+    stats = {'total': len(rows), 'sentiment': {'Positive': 17, 'Neutral': 17, 'Negative': 16},
+             'category': {category: 8 for category in CATEGORIES}}
+    return [
+        ('/', 'index.html', {'categories': CATEGORIES}),
+        ('/about', 'about.html', {}),
+        ('/admin/login', 'admin_login.html', {}),
+        ('/archive', 'archive.html', {
+            'feedback_list': rows, 'items_html': '', 'next_cursor': 'abc', 'categories': CATEGORIES,
+            'current_category': '', 'date_start': '', 'date_end': '', 'search_query': '', 'is_admin': False}),
+        ('/archive (cards)', '_archive_items.html', {'feedback_list': rows, 'snippets': {}, 'is_admin': True}),
+        ('/admin', 'admin_dashboard.html', {
+            'feedback_list': rows, 'next_cursor': 'abc', 'is_first_page': True, 'stats': stats, 'categories': CATEGORIES}),
+    ]
+
+
+def timed(render, iterations):
+    render()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main(iterations):
+    print('%-20s %12s %12s %9s' % ('route', 'source (ms)', 'loader (ms)', 'speedup'))
+    with app.test_request_context('/'):
+        for route, name, context in contexts():
+            source = app.jinja_loader.get_source(app.jinja_env, name)[0]
+            before = timed(lambda: render_template_string(source, **context), iterations)
+            after = timed(lambda: render_template(name, **context), iterations)
+            print('%-20s %12.3f %12.3f %8.1fx' % (route, before, after, before / after))
+
+    # The index page is additionally served from the static render cache
+    client = app.test_client()
+    print()
+    print('%-20s %12s' % ('route', 'request (ms)'))
+    for route in ('/', '/about', '/admin/login'):
+        print('%-20s %12.3f' % (route, timed(lambda: client.get(route), iterations)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,22 @@
+# Gunicorn settings for wsgi:app; each can be overridden from the environment.
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# Threaded workers, since each open /admin/events stream holds a thread; the
+# app caps those at EVENTS_MAX_STREAMS per worker so requests keep the rest
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Import the app in each worker rather than in the master, so the sentiment
+# worker threads and database connections are created after the fork
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
@@ -0,0 +1,351 @@
+# Request instrumentation.
+#
+# Every request gets a RequestProfile that adds up the time spent in SQL,
+# template rendering and sentiment analysis, and counts the queries it ran
+# and the rows it fetched. Finished profiles feed a small in-process
+# registry that is rendered in the Prometheus text format. With sampling
+# enabled, the stacks of running requests are sampled on a timer and the
+# slowest requests are written out as collapsed stacks, one
+# "frame;frame;frame count" line per stack, which flamegraph.pl and
+# speedscope read directly.
+import heapq
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import g, has_app_context, request
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+
+PHASES = ('sql', 'render', 'sentiment')
+
+# Histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        self.rows = 0
+        self.status = None
+        self.stacks = None
+        self._render_depth = 0
+        self._render_start = None
+
+    def duration(self):
+        return time.perf_counter() - self.start
+
+
+def current_profile():
+    return g.get('request_profile') if has_app_context() else None
+
+
+def _fetched(start, rows):
+    profile = current_profile()
+    if profile is not None:
+        profile.phases['sql'] += time.perf_counter() - start
+        profile.rows += rows
+
+
+class CountingCursor(sqlite3.Cursor):
+    # SQLite does most of a query's work while rows are stepped through, so
+    # fetch time counts towards the SQL phase along with execute
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        _fetched(start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany() if size is None else super().fetchmany(size)
+        _fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        _fetched(start, len(rows))
+        return rows
+
+
+class CountingConnection(sqlite3.Connection):
+    # Passed to sqlite3.connect as factory= (see the engine options in app.py)
+    def cursor(self, factory=None):
+        return super().cursor(factory or CountingCursor)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (name, _escape(value)) for name, value in labels)
+
+
+class Registry:
+    # Counters and histograms keyed by name and sorted label pairs
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = defaultdict(float)
+        self._histograms = {}
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(BUCKETS), 0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def render(self, gauges=()):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, [list(value[0]), value[1], value[2]]) for key, value in self._histograms.items())
+
+        def header(name, default_kind):
+            kind, help_text = self._help.get(name, (default_kind, ''))
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s %s' % (name, kind))
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                header(name, 'counter')
+                seen.add(name)
+            lines.append('%s%s %s' % (name, _labels(labels), repr(float(value))))
+        for (name, labels), (buckets, total, count) in histograms:
+            if name not in seen:
+                header(name, 'histogram')
+                seen.add(name)
+            for bound, bucket in zip(BUCKETS, buckets):
+                lines.append('%s_bucket%s %d' % (name, _labels(labels + (('le', repr(bound)),)), bucket))
+            lines.append('%s_bucket%s %d' % (name, _labels(labels + (('le', '+Inf'),)), count))
+            lines.append('%s_sum%s %s' % (name, _labels(labels), repr(total)))
+            lines.append('%s_count%s %d' % (name, _labels(labels), count))
+        for name, help_text, value in gauges:
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s gauge' % name)
+            lines.append('%s %s' % (name, repr(float(value))))
+        return '\n'.join(lines) + '\n'
+
+
+def collapse(frame):
+    # Root-first "function (file:line)" frames joined by ';'
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append('%s (%s:%d)' % (
+            getattr(code, 'co_qualname', code.co_name), os.path.basename(code.co_filename), code.co_firstlineno))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Sampler:
+    # One daemon thread that samples the stack of every thread with a request
+    # in progress, every interval seconds
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._active = {}
+        self._thread = None
+
+    def begin(self):
+        stacks = Counter()
+        with self._lock:
+            self._active[threading.get_ident()] = stacks
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-sampler', daemon=True)
+                self._thread.start()
+        return stacks
+
+    def end(self):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._active)
+            samples = [(thread_id, collapse(frames[thread_id])) for thread_id in threads if thread_id in frames]
+            # Counted under the lock, so nothing is added once end() returns
+            with self._lock:
+                for thread_id, stack in samples:
+                    stacks = self._active.get(thread_id)
+                    if stacks is not None:
+                        stacks[stack] += 1
+
+
+class SlowestProfiles:
+    # Keeps the collapsed stacks of the slowest requests seen by this process,
+    # deleting the file of whichever falls out of the top keep
+    def __init__(self, directory, keep):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._heap = []
+
+    def offer(self, duration, endpoint, stacks):
+        if not stacks or self.keep <= 0:
+            return None
+        with self._lock:
+            if len(self._heap) >= self.keep and duration <= self._heap[0][0]:
+                return None
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, '%s-%d-%s-%dms.folded' % (
+                datetime.utcnow().strftime('%Y%m%dT%H%M%S'), os.getpid(), endpoint.replace('/', '_'), duration * 1000))
+            with open(path, 'w') as f:
+                for stack, count in stacks.most_common():
+                    f.write('%s %d\n' % (stack, count))
+            heapq.heappush(self._heap, (duration, path))
+            if len(self._heap) > self.keep:
+                _, evicted = heapq.heappop(self._heap)
+                try:
+                    os.remove(evicted)
+                except OSError:
+                    pass
+            return path
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.app = None
+        self.registry = Registry()
+        self.skip = set()
+        self._sampler = None
+        self._slowest = None
+        self.registry.describe('feedback_request_duration_seconds', 'histogram', 'Time to serve a request.')
+        self.registry.describe('feedback_request_phase_seconds_total', 'counter',
+                               'Request time spent in SQL, template rendering, sentiment analysis or other code.')
+        self.registry.describe('feedback_request_queries_total', 'counter', 'SQL statements executed by requests.')
+        self.registry.describe('feedback_request_rows_total', 'counter', 'Rows fetched from the database by requests.')
+        self.registry.describe('feedback_sentiment_seconds', 'histogram', 'Time per sentiment classification call.')
+        self.registry.describe('feedback_sentiment_messages_total', 'counter', 'Messages passed to the classifier.')
+
+    def init_app(self, app):
+        self.app = app
+        self._sampler = self._slowest = None
+        if not app.config['METRICS_ENABLED']:
+            return
+        self.skip = set(app.config['METRICS_SKIP_ENDPOINTS'])
+        if app.config['PROFILE_SAMPLING']:
+            self._sampler = Sampler(app.config['PROFILE_INTERVAL'])
+            self._slowest = SlowestProfiles(app.config['PROFILE_DIR'], app.config['PROFILE_KEEP'])
+        app.before_request(self._begin)
+        app.after_request(self._response)
+        app.teardown_request(self._finish)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+
+    def instrument_engine(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    @contextmanager
+    def sentiment(self, messages):
+        # Times a classifier call, inside a request or in a background worker
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.registry.observe('feedback_sentiment_seconds', elapsed)
+            self.registry.inc('feedback_sentiment_messages_total', messages)
+            profile = current_profile()
+            if profile is not None:
+                profile.phases['sentiment'] += elapsed
+
+    def render(self, gauges=()):
+        return self.registry.render(gauges)
+
+    def _begin(self):
+        if request.endpoint in self.skip:
+            return
+        profile = g.request_profile = RequestProfile()
+        if self._sampler is not None:
+            profile.stacks = self._sampler.begin()
+
+    def _response(self, response):
+        profile = g.get('request_profile')
+        if profile is not None:
+            profile.status = response.status_code
+        return response
+
+    def _finish(self, exc):
+        profile = g.pop('request_profile', None)
+        if profile is None:
+            return
+        duration = profile.duration()
+        if self._sampler is not None:
+            self._sampler.end()
+        endpoint = request.endpoint or 'unmatched'
+        status = profile.status or 500
+        self.registry.observe('feedback_request_duration_seconds', duration,
+                              endpoint=endpoint, method=request.method, status=status)
+        other = duration
+        for phase, seconds in profile.phases.items():
+            self.registry.inc('feedback_request_phase_seconds_total', seconds, endpoint=endpoint, phase=phase)
+            other -= seconds
+        self.registry.inc('feedback_request_phase_seconds_total', max(other, 0.0), endpoint=endpoint, phase='other')
+        self.registry.inc('feedback_request_queries_total', profile.queries, endpoint=endpoint)
+        self.registry.inc('feedback_request_rows_total', profile.rows, endpoint=endpoint)
+        if self._slowest is not None:
+            self._slowest.offer(duration, endpoint, profile.stacks)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        profile = current_profile()
+        if profile is None:
+            return
+        profile.phases['sql'] += elapsed
+        profile.queries += 1
+        # Drivers other than CountingCursor report result rows up front
+        if not isinstance(cursor, CountingCursor) and cursor.description is not None and cursor.rowcount > 0:
+            profile.rows += cursor.rowcount
+
+    def _render_started(self, sender, template, context, **extra):
+        profile = current_profile()
+        if profile is None:
+            return
+        # Included and nested renders count once, and queries run while
+        # rendering stay in the SQL phase
+        if profile._render_depth == 0:
+            profile._render_start = (time.perf_counter(), profile.phases['sql'])
+        profile._render_depth += 1
+
+    def _render_finished(self, sender, template, context, **extra):
+        profile = current_profile()
+        if profile is None or profile._render_depth == 0:
+            return
+        profile._render_depth -= 1
+        if profile._render_depth == 0:
+            start, sql = profile._render_start
+            profile.phases['render'] += (time.perf_counter() - start) - (profile.phases['sql'] - sql)
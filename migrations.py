@@ -0,0 +1,249 @@
+# Versioned schema migrations.
+#
+# Each migration runs once, in order, inside its own transaction, and is
+# recorded in the schema_migrations table. Migrations describe the schema as
+# it was when they were written, so they never import the application models.
+import time
+from datetime import datetime
+
+from sqlalchemy import MetaData, Table, Column, Integer, String, Text, Date, DateTime, Index, inspect, text
+
+# SQLite's current UTC time with milliseconds, in the format DateTime columns read back
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def _create_base_tables(connection):
+    # The schema that db.create_all() used to build
+    metadata = MetaData()
+    Table(
+        'feedback', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('name', String(100), nullable=False),
+        Column('email', String(100), nullable=True),
+        Column('category', String(50), nullable=False),
+        Column('message', Text, nullable=False),
+        Column('sentiment', String(20), nullable=True),
+        Column('submitted_at', DateTime)
+    )
+    Table(
+        'user', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('username', String(80), unique=True, nullable=False),
+        Column('password_hash', String(200), nullable=False)
+    )
+    metadata.create_all(connection, checkfirst=True)
+
+
+def _add_listing_indexes(connection):
+    feedback = Table('feedback', MetaData(), autoload_with=connection)
+    indexes = [
+        # Newest-first listings and keyset pagination
+        Index('ix_feedback_submitted_at_id', feedback.c.submitted_at, feedback.c.id),
+        # Category filter combined with date ranges and ordering
+        Index('ix_feedback_category_submitted_at', feedback.c.category, feedback.c.submitted_at, feedback.c.id),
+        # Covers the dashboard's GROUP BY category, sentiment
+        Index('ix_feedback_category_sentiment', feedback.c.category, feedback.c.sentiment),
+        # Rows still waiting for the sentiment worker
+        Index(
+            'ix_feedback_unclassified', feedback.c.id,
+            sqlite_where=feedback.c.sentiment.is_(None),
+            postgresql_where=feedback.c.sentiment.is_(None)
+        ),
+    ]
+    for index in indexes:
+        index.create(connection, checkfirst=True)
+
+
+def _add_feedback_updated_at(connection):
+    # Lets API clients sync incrementally; existing rows count as updated on submission
+    columns = [column['name'] for column in inspect(connection).get_columns('feedback')]
+    if 'updated_at' not in columns:
+        column_type = DateTime().compile(dialect=connection.dialect)
+        connection.execute(text('ALTER TABLE feedback ADD COLUMN updated_at %s' % column_type))
+    connection.execute(text('UPDATE feedback SET updated_at = submitted_at WHERE updated_at IS NULL'))
+
+    feedback = Table('feedback', MetaData(), autoload_with=connection)
+    Index('ix_feedback_updated_at_id', feedback.c.updated_at, feedback.c.id).create(connection, checkfirst=True)
+
+
+# Keep feedback_daily_stats in step with every write to feedback, in the same
+# transaction. NULL sentiment is counted as 'Pending'.
+_DAILY_STATS_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS feedback_daily_stats_insert AFTER INSERT ON feedback "
+    "WHEN new.submitted_at IS NOT NULL BEGIN {add_new} END",
+    "CREATE TRIGGER IF NOT EXISTS feedback_daily_stats_delete AFTER DELETE ON feedback "
+    "WHEN old.submitted_at IS NOT NULL BEGIN {remove_old} END",
+    "CREATE TRIGGER IF NOT EXISTS feedback_daily_stats_update AFTER UPDATE OF sentiment, category, submitted_at ON feedback "
+    "WHEN old.sentiment IS NOT new.sentiment OR old.category IS NOT new.category "
+    "OR old.submitted_at IS NOT new.submitted_at BEGIN {remove_old} {add_new} END",
+]
+_ADD_NEW = (
+    "INSERT INTO feedback_daily_stats (day, category, sentiment, count) "
+    "SELECT date(new.submitted_at), new.category, coalesce(new.sentiment, 'Pending'), 1 "
+    "WHERE new.submitted_at IS NOT NULL "
+    "ON CONFLICT (day, category, sentiment) DO UPDATE SET count = count + 1;"
+)
+_REMOVE_OLD = (
+    "UPDATE feedback_daily_stats SET count = count - 1 WHERE day = date(old.submitted_at) "
+    "AND category = old.category AND sentiment = coalesce(old.sentiment, 'Pending'); "
+    "DELETE FROM feedback_daily_stats WHERE day = date(old.submitted_at) "
+    "AND category = old.category AND sentiment = coalesce(old.sentiment, 'Pending') AND count <= 0;"
+)
+
+
+# The same rollup on PostgreSQL, as one row-level trigger function
+_DAILY_STATS_POSTGRESQL = [
+    "CREATE OR REPLACE FUNCTION feedback_daily_stats_apply() RETURNS trigger AS $$ BEGIN "
+    "IF TG_OP IN ('DELETE', 'UPDATE') AND old.submitted_at IS NOT NULL THEN "
+    "UPDATE feedback_daily_stats SET count = count - 1 WHERE day = old.submitted_at::date "
+    "AND category = old.category AND sentiment = coalesce(old.sentiment, 'Pending'); "
+    "DELETE FROM feedback_daily_stats WHERE day = old.submitted_at::date "
+    "AND category = old.category AND sentiment = coalesce(old.sentiment, 'Pending') AND count <= 0; "
+    "END IF; "
+    "IF TG_OP IN ('INSERT', 'UPDATE') AND new.submitted_at IS NOT NULL THEN "
+    "INSERT INTO feedback_daily_stats (day, category, sentiment, count) "
+    "VALUES (new.submitted_at::date, new.category, coalesce(new.sentiment, 'Pending'), 1) "
+    "ON CONFLICT (day, category, sentiment) DO UPDATE SET count = feedback_daily_stats.count + 1; "
+    "END IF; "
+    "RETURN NULL; END $$ LANGUAGE plpgsql",
+    "DROP TRIGGER IF EXISTS feedback_daily_stats ON feedback",
+    "CREATE TRIGGER feedback_daily_stats AFTER INSERT OR DELETE OR UPDATE OF sentiment, category, submitted_at "
+    "ON feedback FOR EACH ROW EXECUTE FUNCTION feedback_daily_stats_apply()",
+]
+
+
+def _add_daily_stats(connection):
+    # Rollup of feedback counts per day, category and sentiment
+    metadata = MetaData()
+    daily_stats = Table(
+        'feedback_daily_stats', metadata,
+        Column('day', Date, primary_key=True),
+        Column('category', String(50), primary_key=True),
+        Column('sentiment', String(20), primary_key=True),
+        Column('count', Integer, nullable=False)
+    )
+    Index('ix_feedback_daily_stats_category_sentiment', daily_stats.c.category, daily_stats.c.sentiment, daily_stats.c['count'])
+    metadata.create_all(connection, checkfirst=True)
+
+    if connection.dialect.name == 'sqlite':
+        triggers = [trigger.format(add_new=_ADD_NEW, remove_old=_REMOVE_OLD) for trigger in _DAILY_STATS_TRIGGERS]
+    elif connection.dialect.name == 'postgresql':
+        triggers = _DAILY_STATS_POSTGRESQL
+    else:
+        raise NotImplementedError('feedback_daily_stats triggers are only written for SQLite and PostgreSQL')
+    for trigger in triggers:
+        connection.execute(text(trigger))
+
+    connection.execute(text('DELETE FROM feedback_daily_stats'))
+    connection.execute(text(
+        "INSERT INTO feedback_daily_stats (day, category, sentiment, count) "
+        "SELECT date(submitted_at), category, coalesce(sentiment, 'Pending'), count(*) FROM feedback "
+        "WHERE submitted_at IS NOT NULL GROUP BY 1, 2, 3"
+    ))
+
+
+def _add_feedback_version(connection):
+    # A single-row counter bumped by triggers in the same transaction as every
+    # write to feedback, so all worker processes agree on the data version.
+    # It starts from the clock so versions never repeat if the database is recreated.
+    metadata = MetaData()
+    feedback_version = Table(
+        'feedback_version', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('version', Integer, nullable=False),
+        Column('changed_at', DateTime, nullable=False)
+    )
+    metadata.create_all(connection, checkfirst=True)
+    if connection.execute(feedback_version.select()).first() is None:
+        connection.execute(feedback_version.insert().values(
+            id=1, version=int(time.time() * 1000), changed_at=datetime.utcnow()
+        ))
+
+    if connection.dialect.name == 'postgresql':
+        # Once per statement is enough to change the version
+        connection.execute(text(
+            "CREATE OR REPLACE FUNCTION feedback_version_bump() RETURNS trigger AS $$ BEGIN "
+            "UPDATE feedback_version SET version = version + 1, changed_at = now() AT TIME ZONE 'utc' WHERE id = 1; "
+            "RETURN NULL; END $$ LANGUAGE plpgsql"
+        ))
+        connection.execute(text('DROP TRIGGER IF EXISTS feedback_version ON feedback'))
+        connection.execute(text(
+            'CREATE TRIGGER feedback_version AFTER INSERT OR DELETE OR UPDATE ON feedback '
+            'FOR EACH STATEMENT EXECUTE FUNCTION feedback_version_bump()'
+        ))
+        return
+    if connection.dialect.name != 'sqlite':
+        raise NotImplementedError('feedback_version triggers are only written for SQLite and PostgreSQL')
+    _create_sqlite_version_triggers(connection)
+
+
+def _create_sqlite_version_triggers(connection):
+    # changed_at keeps milliseconds so Last-Modified can tell writes within a second apart
+    bump = "UPDATE feedback_version SET version = version + 1, changed_at = %s WHERE id = 1;" % SQLITE_NOW
+    for event in ('INSERT', 'DELETE', 'UPDATE'):
+        connection.execute(text(
+            'CREATE TRIGGER IF NOT EXISTS feedback_version_%s AFTER %s ON feedback BEGIN %s END'
+            % (event.lower(), event, bump)
+        ))
+
+
+def _feedback_version_subsecond(connection):
+    # Databases from migration 5 stamp changed_at with whole seconds; the
+    # PostgreSQL function already uses now(), which keeps microseconds
+    if connection.dialect.name != 'sqlite':
+        return
+    for event in ('insert', 'delete', 'update'):
+        connection.execute(text('DROP TRIGGER IF EXISTS feedback_version_%s' % event))
+    _create_sqlite_version_triggers(connection)
+
+
+MIGRATIONS = [
+    (1, 'Create feedback and user tables', _create_base_tables),
+    (2, 'Add listing indexes to feedback', _add_listing_indexes),
+    (3, 'Add feedback.updated_at for incremental sync', _add_feedback_updated_at),
+    (4, 'Add feedback_daily_stats rollup', _add_daily_stats),
+    (5, 'Add feedback_version for cross-process cache validation', _add_feedback_version),
+    (6, 'Record feedback_version.changed_at with sub-second precision', _feedback_version_subsecond),
+]
+
+_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+
+def current_version(connection):
+    if not inspect(connection).has_table('schema_migrations'):
+        return 0
+    versions = [row.version for row in connection.execute(schema_migrations.select())]
+    return max(versions, default=0)
+
+
+def pending(engine):
+    with engine.connect() as connection:
+        version = current_version(connection)
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+
+def upgrade(engine, target=None):
+    # Apply every pending migration up to target; returns the ones applied
+    applied = []
+    with engine.begin() as connection:
+        _metadata.create_all(connection, checkfirst=True)
+
+    for version, description, migrate in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        with engine.begin() as connection:
+            # Re-check inside the transaction in case another process got here first
+            if current_version(connection) >= version:
+                continue
+            migrate(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+        applied.append((version, description))
+    return applied
@@ -0,0 +1,174 @@
+# Minimal streaming PDF writer for tabular feedback exports.
+#
+# Pages are written to the output file as soon as they fill up, so memory
+# use depends on the page size rather than on the number of rows. Only the
+# standard Helvetica fonts are used, which every PDF viewer ships with; they
+# cover Windows-1252 (Western European) text, and any other character is
+# written as "?". lossy_rows counts the rows that lost characters that way.
+import textwrap
+import zlib
+
+PAGE_WIDTH = 842   # A4 landscape, in points
+PAGE_HEIGHT = 595
+MARGIN = 36
+FONT_SIZE = 8
+LEADING = 10
+CELL_PADDING = 4
+
+HEADER_COLOR = (0.306, 0.451, 0.875)   # #4e73df
+STRIPE_COLOR = (0.949, 0.949, 0.949)   # #f2f2f2
+MUTED_COLOR = (0.424, 0.459, 0.490)    # #6c757d
+
+
+def _encodable(text):
+    try:
+        str(text).encode('cp1252')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _escape(text):
+    # PDF literal strings use WinAnsiEncoding with the standard fonts
+    text = str(text).encode('cp1252', errors='replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').replace('\r', '').replace('\n', ' ')
+
+
+def _wrap(text, width):
+    # Helvetica averages about half an em per character
+    max_chars = max(1, int((width - 2 * CELL_PADDING) / (FONT_SIZE * 0.5)))
+    return textwrap.wrap(str(text), max_chars, break_long_words=True) or ['']
+
+
+class PDFTableWriter:
+    def __init__(self, fileobj, columns, title, subtitle='', footer=''):
+        # columns is a list of (heading, relative width) pairs
+        self.fileobj = fileobj
+        self.title = title
+        self.subtitle = subtitle
+        self.footer = footer
+        total = float(sum(width for _, width in columns))
+        usable = PAGE_WIDTH - 2 * MARGIN
+        self.headings = [heading for heading, _ in columns]
+        self.widths = [usable * width / total for _, width in columns]
+
+        self.offsets = {}
+        self.page_ids = []
+        self.rows = 0
+        self.lossy_rows = 0
+        self._position = 0
+        # Objects 1-4 are written last, once the page list is known
+        self._next_id = 5
+        self._ops = []
+        self._y = None
+        self._stripe = False
+
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    @property
+    def pages(self):
+        return len(self.page_ids)
+
+    def add_row(self, values):
+        if not all(_encodable(value) for value in values):
+            self.lossy_rows += 1
+        cells = [_wrap(value, width) for value, width in zip(values, self.widths)]
+        # A single row never spills past one page
+        max_lines = (PAGE_HEIGHT - 2 * MARGIN - 80) // LEADING
+        cells = [lines if len(lines) <= max_lines else lines[:max_lines - 1] + ['...'] for lines in cells]
+        height = max(len(lines) for lines in cells) * LEADING + CELL_PADDING
+
+        if self._y is None or self._y - height < MARGIN + LEADING * 2:
+            self._new_page()
+
+        if self._stripe:
+            self._rect(MARGIN, self._y - height, sum(self.widths), height, STRIPE_COLOR)
+        self._stripe = not self._stripe
+        self._cells(cells, self._y, 'F1')
+        self._y -= height
+        self.rows += 1
+
+    def close(self):
+        if self._y is None:
+            self._new_page()
+        self._finish_page()
+
+        kids = ' '.join('%d 0 R' % page_id for page_id in self.page_ids)
+        self._object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        self._object(2, ('<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self.page_ids))).encode('ascii'))
+        self._object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+        self._object(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+
+        xref_offset = self._position
+        count = self._next_id
+        xref = ['xref\n0 %d\n' % count, '0000000000 65535 f \n']
+        for object_id in range(1, count):
+            xref.append('%010d 00000 n \n' % self.offsets[object_id])
+        xref.append('trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (count, xref_offset))
+        self._write(''.join(xref).encode('ascii'))
+
+    def _new_page(self):
+        if self._y is not None:
+            self._finish_page()
+
+        self._ops = []
+        self._stripe = False
+        top = PAGE_HEIGHT - MARGIN
+        if not self.page_ids:
+            self._text(MARGIN, top - 14, 'F2', 16, self.title, HEADER_COLOR)
+            top -= 24
+            if self.subtitle:
+                self._text(MARGIN, top - 10, 'F1', FONT_SIZE + 1, self.subtitle, MUTED_COLOR)
+                top -= 20
+
+        header_height = LEADING + CELL_PADDING
+        self._rect(MARGIN, top - header_height, sum(self.widths), header_height, HEADER_COLOR)
+        self._cells([[heading] for heading in self.headings], top, 'F2', (1, 1, 1))
+        self._y = top - header_height
+        # Reserve the page's object id now so page numbers follow row order
+        self.page_ids.append(self._reserve())
+
+    def _finish_page(self):
+        page_number = len(self.page_ids)
+        footer = '%s    Page %d' % (self.footer, page_number) if self.footer else 'Page %d' % page_number
+        self._text(MARGIN, MARGIN - 14, 'F1', FONT_SIZE - 1, footer, MUTED_COLOR)
+
+        content = zlib.compress('\n'.join(self._ops).encode('latin-1'))
+        content_id = self._reserve()
+        self._object(content_id, b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content) + content + b'\nendstream')
+        self._object(self.page_ids[-1], (
+            '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+            '/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+            % (PAGE_WIDTH, PAGE_HEIGHT, content_id)
+        ).encode('ascii'))
+        self._ops = []
+
+    def _cells(self, cells, top, font, color=(0, 0, 0)):
+        x = MARGIN
+        for lines, width in zip(cells, self.widths):
+            y = top - LEADING
+            for line in lines:
+                self._text(x + CELL_PADDING, y, font, FONT_SIZE, line, color)
+                y -= LEADING
+            x += width
+
+    def _text(self, x, y, font, size, text, color):
+        self._ops.append('BT %.3f %.3f %.3f rg /%s %d Tf %.2f %.2f Td (%s) Tj ET' % (
+            color[0], color[1], color[2], font, size, x, y, _escape(text)))
+
+    def _rect(self, x, y, width, height, color):
+        self._ops.append('%.3f %.3f %.3f rg %.2f %.2f %.2f %.2f re f' % (
+            color[0], color[1], color[2], x, y, width, height))
+
+    def _reserve(self):
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _object(self, object_id, body):
+        self.offsets[object_id] = self._position
+        self._write(b'%d 0 obj\n' % object_id + body + b'\nendobj\n')
+
+    def _write(self, data):
+        self.fileobj.write(data)
+        self._position += len(data)
@@ -0,0 +1,247 @@
+# Sentiment classifiers.
+#
+# A classifier turns a list of messages into a list of labels in one call,
+# so callers can hand it whole batches. Classifiers are picked by dotted
+# path (see load_classifier), and their version is stored alongside cached
+# results so a change of classifier or thresholds is never mixed with old
+# scores.
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from werkzeug.utils import import_string
+
+POSITIVE = 'Positive'
+NEGATIVE = 'Negative'
+NEUTRAL = 'Neutral'
+
+# Polarity beyond these bounds counts as positive or negative
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+
+
+def label(polarity):
+    if polarity > POSITIVE_THRESHOLD:
+        return POSITIVE
+    if polarity < NEGATIVE_THRESHOLD:
+        return NEGATIVE
+    return NEUTRAL
+
+
+class SentimentClassifier:
+    # Bump the version whenever the labels a classifier returns may change
+    version = 'base'
+
+    def classify(self, texts):
+        raise NotImplementedError
+
+    def polarity(self, text):
+        raise NotImplementedError
+
+    def stats(self):
+        return {'classifier': type(self).__name__, 'version': self.version}
+
+
+class PatternClassifier(SentimentClassifier):
+    # The pattern lexicon that TextBlob's default analyzer uses, scored once per
+    # distinct message with plain dict lookups into the loaded lexicon
+    version = 'pattern-1:%s:%s' % (POSITIVE_THRESHOLD, NEGATIVE_THRESHOLD)
+
+    def __init__(self):
+        self._lexicon = _loaded_lexicon()
+
+    def polarity(self, text):
+        return self._lexicon(text)[0]
+
+    def classify(self, texts):
+        texts = list(texts)
+        labels = {text: label(self.polarity(text)) for text in set(texts)}
+        return [labels[text] for text in texts]
+
+
+def _loaded_lexicon():
+    # Imported here so the lexicon only loads when a classifier is first used
+    from textblob import en
+
+    class Lexicon(en.Sentiment):
+        # lazydict checks whether it has been loaded on every lookup; the
+        # lexicon is loaded up front here, so lookups go straight to the dict
+        __contains__ = dict.__contains__
+        __getitem__ = dict.__getitem__
+        get = dict.get
+
+    shared = en.sentiment
+    lexicon = Lexicon(
+        path=os.path.join(en.MODULE, 'en-sentiment.xml'),
+        synset='wordnet_id',
+        negations=shared.negations,
+        modifiers=shared.modifiers,
+        modifier=shared.modifier,
+        tokenizer=shared.tokenizer,
+        language='en'
+    )
+    lexicon.load()
+    return lexicon
+
+
+# Bumped whenever cache_key changes, so stored entries keyed the old way are dropped
+CACHE_KEY_VERSION = 2
+
+
+def cache_key(text):
+    # Runs of whitespace don't change the score, so they share a key. Case
+    # does: some emoticons only differ in it (":D" and ":d")
+    normalized = ' '.join(text.split())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+class CachedClassifier(SentimentClassifier):
+    # Bounded LRU cache of labels by message hash in front of another classifier,
+    # optionally backed by a SQLite file so hits survive restarts. Entries are
+    # tagged with the classifier version and the cache key format, and entries
+    # from any other version are dropped when the cache opens.
+    def __init__(self, classifier, size=10000, ttl=None, path=None):
+        self.classifier = classifier
+        self.version = classifier.version
+        self._tag = '%s/key-%d' % (classifier.version, CACHE_KEY_VERSION)
+        self.size = size
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.stored_hits = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._store = self._open_store(path) if path else None
+
+    def polarity(self, text):
+        return self.classifier.polarity(text)
+
+    def classify(self, texts):
+        texts = list(texts)
+        keys = [cache_key(text) for text in texts]
+        labels = self._lookup(set(keys))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in labels:
+                missing.setdefault(key, text)
+        if missing:
+            computed = dict(zip(missing, self.classifier.classify(list(missing.values()))))
+            self._remember(computed)
+            labels.update(computed)
+
+        with self._lock:
+            misses = sum(1 for key in keys if key in missing)
+            self.misses += misses
+            self.hits += len(keys) - misses
+        return [labels[key] for key in keys]
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            if self._store is not None:
+                with self._store:
+                    self._store.execute('DELETE FROM sentiment_cache')
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'classifier': type(self.classifier).__name__,
+                'version': self.version,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stored_hits': self.stored_hits,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'persistent': self._store is not None
+            }
+
+    def _lookup(self, keys):
+        found = {}
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if self.ttl is not None and now - entry[1] > self.ttl:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry[0]
+
+            missing = [key for key in keys if key not in found]
+            if self._store is not None and missing:
+                stored = self._load(missing, now)
+                self.stored_hits += len(stored)
+                for key, value in stored.items():
+                    self._put(key, value, now)
+                found.update(stored)
+        return found
+
+    def _remember(self, labels):
+        now = time.time()
+        with self._lock:
+            for key, value in labels.items():
+                self._put(key, value, now)
+            if self._store is not None:
+                with self._store:
+                    self._store.executemany(
+                        'INSERT OR REPLACE INTO sentiment_cache (key, version, sentiment, stored_at) VALUES (?, ?, ?, ?)',
+                        [(key, self._tag, value, now) for key, value in labels.items()]
+                    )
+
+    def _put(self, key, value, stored_at):
+        self._entries[key] = (value, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def _load(self, keys, now):
+        found = {}
+        # Stay well under SQLite's limit on bound parameters
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self._store.execute(
+                'SELECT key, sentiment, stored_at FROM sentiment_cache WHERE version = ? AND key IN (%s)'
+                % ','.join('?' * len(chunk)), [self._tag] + chunk
+            )
+            for key, value, stored_at in rows:
+                if self.ttl is None or now - stored_at <= self.ttl:
+                    found[key] = value
+        return found
+
+    def _open_store(self, path):
+        # One connection shared by the worker threads, serialized by self._lock
+        store = sqlite3.connect(path, check_same_thread=False)
+        with store:
+            store.execute(
+                'CREATE TABLE IF NOT EXISTS sentiment_cache ('
+                'key TEXT PRIMARY KEY, version TEXT NOT NULL, sentiment TEXT NOT NULL, stored_at REAL NOT NULL)'
+            )
+            store.execute('DELETE FROM sentiment_cache WHERE version != ?', (self._tag,))
+        return store
+
+
+def load_classifier(name):
+    # name is a dotted path to a SentimentClassifier subclass
+    return import_string(name)()
+
+
+# Worker process side of parallel reclassification; each process loads its
+# own classifier once and then scores whole chunks
+_worker_classifier = None
+
+
+def init_worker(name):
+    global _worker_classifier
+    _worker_classifier = load_classifier(name)
+
+
+def classify_in_worker(texts):
+    return _worker_classifier.classify(texts)
@@ -0,0 +1,118 @@
+# Synthetic feedback for reproducing production-sized datasets.
+#
+# Rows come out in submission order with timestamps skewed the way real
+# traffic is: busier towards the end of the range (steady growth), at
+# weekends and during opening hours. Categories follow fixed weights, and
+# messages are built from phrase banks so that they carry positive,
+# negative or neutral sentiment. The same seed, row count and date range
+# always produce the same rows.
+import random
+from datetime import datetime, timedelta
+
+CATEGORY_WEIGHTS = {
+    'General Feedback': 30,
+    'Compliment': 20,
+    'Complaint': 15,
+    'Question': 15,
+    'Feature Request': 10,
+    'Bug Report': 10
+}
+
+FIRST_NAMES = ['Ava', 'Ben', 'Chloe', 'Daniel', 'Emma', 'Farah', 'George', 'Hana', 'Ivan', 'Julia', 'Kofi', 'Lena',
+               'Mateo', 'Nora', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sam', 'Tariq', 'Uma', 'Victor', 'Wei', 'Yara']
+LAST_NAMES = ['Adams', 'Brown', 'Chen', 'Diaz', 'Evans', 'Fischer', 'Garcia', 'Hughes', 'Ito', 'Jones', 'Khan',
+              'Lopez', 'Martin', 'Nguyen', 'Okafor', 'Patel', 'Rossi', 'Smith', 'Taylor', 'Walker']
+
+SUBJECTS = {
+    'General Feedback': ['the museum', 'our visit', 'the main hall', 'the sculpture garden', 'the day'],
+    'Compliment': ['the guide', 'the staff', 'the new exhibit', 'the audio tour', 'the children\'s workshop'],
+    'Complaint': ['the queue', 'the cafe', 'the parking', 'the restrooms', 'the ticket desk'],
+    'Question': ['the opening hours', 'the membership', 'the group rates', 'photography', 'the cloakroom'],
+    'Feature Request': ['the app', 'the signage', 'the map', 'the website', 'the audio guide'],
+    'Bug Report': ['the ticket page', 'the app', 'the audio guide', 'the online booking', 'the kiosk']
+}
+
+# Verdicts by tone; each category leans towards the tones its visitors use
+VERDICTS = {
+    'positive': ['was wonderful', 'was really helpful', 'exceeded our expectations', 'was excellent',
+                 'was a delight', 'made the visit great', 'was beautifully done', 'was very friendly'],
+    'negative': ['was terrible', 'was really disappointing', 'was dirty and crowded', 'was awful',
+                 'was not good at all', 'was very slow', 'was broken again', 'was rude and unhelpful'],
+    'neutral': ['was as described', 'opens at ten', 'is on the second floor', 'needs a closer look',
+                'was mentioned by a friend', 'is what we asked about', 'was where we started', 'closes at six']
+}
+TONES = {
+    'General Feedback': {'positive': 5, 'negative': 2, 'neutral': 3},
+    'Compliment': {'positive': 9, 'negative': 0, 'neutral': 1},
+    'Complaint': {'positive': 0, 'negative': 8, 'neutral': 2},
+    'Question': {'positive': 1, 'negative': 1, 'neutral': 8},
+    'Feature Request': {'positive': 3, 'negative': 2, 'neutral': 5},
+    'Bug Report': {'positive': 0, 'negative': 6, 'neutral': 4}
+}
+OPENINGS = ['', 'Honestly, ', 'On Saturday ', 'Today ', 'During our visit ', 'As a member, ']
+FOLLOW_UPS = ['', ' Thanks.', ' We will be back.', ' Please look into it.', ' Any update?',
+              ' The kids noticed too.', ' Keep it up!', ' Not sure who to ask.']
+
+# Relative traffic by weekday (Monday first) and by hour of day
+WEEKDAY_WEIGHTS = [0.8, 0.7, 0.8, 0.9, 1.1, 1.6, 1.5]
+HOUR_WEIGHTS = [1, 0, 0, 0, 0, 0, 1, 2, 4, 8, 12, 14, 14, 13, 13, 12, 10, 7, 5, 4, 3, 3, 2, 1]
+
+# Traffic at the end of the range, relative to the start
+GROWTH = 3.0
+
+
+def daily_counts(rows, days, end):
+    # Rows per day, oldest first, summing to exactly rows
+    start = end - timedelta(days=days)
+    weights = [
+        GROWTH ** (day / max(days - 1, 1)) * WEEKDAY_WEIGHTS[(start + timedelta(days=day)).weekday()]
+        for day in range(days)
+    ]
+    total = sum(weights)
+    counts, carried = [], 0.0
+    for weight in weights:
+        # Carry the rounding remainder forward so the total is exact
+        exact = rows * weight / total + carried
+        counts.append(int(exact))
+        carried = exact - int(exact)
+    counts[-1] += rows - sum(counts)
+    return [(start + timedelta(days=day), count) for day, count in enumerate(counts)]
+
+
+def _message_pool(category, tone):
+    messages = []
+    for opening in OPENINGS:
+        for subject in SUBJECTS[category]:
+            for verdict in VERDICTS[tone]:
+                for follow_up in FOLLOW_UPS:
+                    message = '%s%s %s.%s' % (opening, subject, verdict, follow_up)
+                    messages.append(message[0].upper() + message[1:])
+    return messages
+
+
+def generate(rows, seed=0, days=365, end=None):
+    # Yields (name, email, category, message, submitted_at) in submission order;
+    # end defaults to the start of today (UTC). Choices are drawn a day at a
+    # time, since one call per day is much cheaper than one per row.
+    rng = random.Random(seed)
+    end = end or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    kinds = [(category, tone) for category in CATEGORY_WEIGHTS for tone in TONES[category] if TONES[category][tone]]
+    kind_weights = [CATEGORY_WEIGHTS[category] * TONES[category][tone] for category, tone in kinds]
+    pools = {kind: _message_pool(*kind) for kind in kinds}
+    names = [(first, last) for first in FIRST_NAMES for last in LAST_NAMES]
+    hours = [hour * 3600000000 for hour in range(24)]
+    serial = 0
+    for day, count in daily_counts(rows, days, end):
+        # Microseconds into the day, in order
+        times = sorted(hour + int(rng.random() * 3600000000) for hour in rng.choices(hours, HOUR_WEIGHTS, k=count))
+        for offset, (category, tone), (first, last) in zip(
+                times, rng.choices(kinds, kind_weights, k=count), rng.choices(names, k=count)):
+            serial += 1
+            pool = pools[category, tone]
+            yield (
+                '%s %s' % (first, last),
+                '%s.%s%d@example.com' % (first.lower(), last.lower(), serial) if rng.random() < 0.6 else None,
+                category,
+                pool[int(rng.random() * len(pool))],
+                day + timedelta(microseconds=offset)
+            )
@@ -1,18 +1,898 @@
+import os
+
 import pytest
-from app import app as flask_app
+from app import create_app, init_database
+
+
+def build_app(directory, config=None):
+    # An app whose database, instance folder and caches all live in directory
+    config = dict({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///%s" % (directory / "feedback.db"),
+        "SECRET_KEY": "test",
+        "SENTIMENT_CACHE_PATH": None,
+        "TEMPLATE_CACHE_DIR": str(directory / "jinja_cache")
+    }, **(config or {}))
+    # With TEST_SQLITE_REPLICA set, reads go through a separate read-only pool
+    # on the same file, standing in for a replica
+    if os.environ.get("TEST_SQLITE_REPLICA"):
+        config.setdefault("DATABASE_REPLICA_URI", config["SQLALCHEMY_DATABASE_URI"])
+    return create_app(config, instance_path=str(directory / "instance"))
+
+
+@pytest.fixture(scope="session")
+def flask_app(tmp_path_factory):
+    app = build_app(tmp_path_factory.mktemp("app"))
+    with app.app_context():
+        init_database()
+    return app
+
+
+@pytest.fixture(autouse=True)
+def feedback_cleanup(flask_app):
+    # Deletes every feedback row a test added, however it was added
+    from app import db, Feedback
+
+    with flask_app.app_context():
+        last_id = db.session.query(db.func.max(Feedback.id)).scalar() or 0
+    yield
+    with flask_app.app_context():
+        Feedback.query.filter(Feedback.id > last_id).delete(synchronize_session=False)
+        db.session.commit()
+
+
+@pytest.fixture
+def add_feedback(flask_app):
+    # Inserts Feedback rows and returns their ids; feedback_cleanup removes them
+    from app import db
+
+    def add(*rows):
+        with flask_app.app_context():
+            db.session.add_all(rows)
+            db.session.commit()
+            return [row.id for row in rows]
+    return add
 
 
 @pytest.fixture
-def client():
+def client(flask_app):
     with flask_app.test_client() as client:
         yield client
 
 
+def active_nav(response):
+    return response.get_data(as_text=True).split('nav-link active" href="')[1].split('"')[0]
+
+
 def test_home(client):
     response = client.get("/")
     assert response.status_code == 200
+    assert active_nav(response) == "/"
 
 
 def test_about(client):
     response = client.get("/about")
     assert response.status_code == 200
+    assert active_nav(response) == "/about"
+    assert active_nav(client.get("/archive")) == "/archive"
+
+
+@pytest.fixture
+def admin_client(client):
+    with client.session_transaction() as sess:
+        sess['logged_in'] = True
+        sess['username'] = 'admin'
+    yield client
+
+
+def test_submit_classifies_sentiment_in_background(flask_app, client):
+    from app import Feedback, sentiment_worker
+
+    response = client.post("/submit", data={
+        "name": "Worker Test",
+        "category": "Compliment",
+        "message": "What a wonderful, excellent visit!"
+    })
+    assert response.status_code == 302
+
+    assert sentiment_worker.wait(timeout=10)
+    with flask_app.app_context():
+        feedback = Feedback.query.filter_by(name="Worker Test").order_by(Feedback.id.desc()).first()
+        assert feedback.sentiment == "Positive"
+
+
+def test_sentiment_backlog_is_queued_a_batch_at_a_time(flask_app, add_feedback, monkeypatch):
+    import app as app_module
+    from app import db, Feedback, SentimentWorker
+
+    ids = add_feedback(*[Feedback(name="Backlog %d" % i, category="Question", message="Nice visit %d" % i)
+                         for i in range(5)])
+    # A worker of its own, started as if another process owned the backlog
+    worker = SentimentWorker()
+    worker.init_app(flask_app)
+    monkeypatch.setattr(app_module, "claim_process_lock", lambda app, name: None)
+    worker.start()
+
+    depths = []
+    enqueue = worker.enqueue
+    monkeypatch.setitem(flask_app.config, "SENTIMENT_BATCH_SIZE", 2)
+    monkeypatch.setattr(worker, "enqueue", lambda feedback_id: (enqueue(feedback_id), depths.append(worker.queue_depth())))
+    worker._scan_backlog()
+    assert worker.wait(timeout=10)
+    assert max(depths) <= 2
+    with flask_app.app_context():
+        assert db.session.query(Feedback).filter(Feedback.id.in_(ids), Feedback.sentiment.is_(None)).count() == 0
+
+
+def test_sentiment_status(admin_client):
+    response = admin_client.get("/api/sentiment/status")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert {"queue_depth", "lag_seconds", "processed"} <= set(data)
+
+
+def test_pattern_classifier_matches_textblob():
+    from textblob import TextBlob
+    from sentiment import PatternClassifier, label
+
+    messages = [
+        "What a wonderful, excellent visit!",
+        "The staff were rude and the exhibit was not very good.",
+        "The museum opens at nine.",
+        "Terribly crowded!!! (!)",
+        "What a wonderful, excellent visit!",
+    ]
+    expected = [label(TextBlob(message).sentiment.polarity) for message in messages]
+    assert PatternClassifier().classify(messages) == expected
+    assert expected[:3] == ["Positive", "Negative", "Neutral"]
+
+
+def test_sentiment_cache_persists_and_tracks_version(tmp_path):
+    from sentiment import SentimentClassifier, CachedClassifier
+
+    class CountingClassifier(SentimentClassifier):
+        version = "counting-1"
+
+        def __init__(self):
+            self.calls = []
+
+        def classify(self, texts):
+            self.calls.extend(texts)
+            return ["Positive" for _ in texts]
+
+    path = str(tmp_path / "cache.db")
+    inner = CountingClassifier()
+    cache = CachedClassifier(inner, size=2, path=path)
+    assert cache.classify(["great!", " great!  ", "Thanks"]) == ["Positive"] * 3
+    assert inner.calls == ["great!", "Thanks"]
+    assert cache.classify(["great!"]) == ["Positive"]
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 3)
+
+    # Case is part of the key, since emoticons such as :D and :d differ only in it
+    cache.classify([":D", ":d"])
+    assert inner.calls == ["great!", "Thanks", ":D", ":d"]
+
+    # A new process reads hits back from the file
+    inner = CountingClassifier()
+    restarted = CachedClassifier(inner, path=path)
+    restarted.classify(["great!", ":d"])
+    assert inner.calls == [] and restarted.stats()["stored_hits"] == 2
+
+    # A different classifier version starts from an empty cache
+    inner = CountingClassifier()
+    inner.version = "counting-2"
+    CachedClassifier(inner, path=path).classify(["great!"])
+    assert inner.calls == ["great!"]
+
+
+def test_archive_keyset_pagination(client, add_feedback):
+    from app import Feedback
+
+    add_feedback(*[
+        Feedback(name="Pager %d" % i, category="Question", message="paginationtoken %d" % i, sentiment="Neutral")
+        for i in range(5)
+    ])
+
+    response = client.get("/archive?search=paginationtoken&page_size=2")
+    assert response.status_code == 200
+    assert b"Pager 4" in response.data and b"Pager 2" not in response.data
+
+    cursor = response.data.split(b'data-cursor="')[1].split(b'"')[0].decode()
+    seen = []
+    while cursor:
+        data = client.get("/archive/more?search=paginationtoken&page_size=2&cursor=" + cursor).get_json()
+        seen.append(data["count"])
+        cursor = data["next_cursor"]
+    assert seen == [2, 1]
+    assert client.get("/archive/more?cursor=bogus").status_code == 400
+
+    # Malformed dates are a client error, not a server one
+    response = client.get("/archive/more?date_start=bad&cursor=" + response.data.split(b'data-cursor="')[1].split(b'"')[0].decode())
+    assert response.status_code == 400 and "YYYY-MM-DD" in response.get_json()["error"]
+    response = client.get("/archive?date_start=bad&search=paginationtoken", follow_redirects=True)
+    assert response.request.path == "/archive" and response.request.args.to_dict() == {"search": "paginationtoken"}
+    assert b"Dates must be in YYYY-MM-DD format" in response.data
+
+
+def test_dashboard_stats_invalidated_on_write(flask_app, admin_client):
+    from app import Feedback, feedback_stats, sentiment_worker
+
+    with flask_app.app_context():
+        before = feedback_stats.get()["total"]
+
+    admin_client.post("/submit", data={"name": "Stats Test", "category": "Question", "message": "Is it open?"})
+    sentiment_worker.wait(timeout=10)
+    with flask_app.app_context():
+        assert feedback_stats.get()["total"] == before + 1
+        feedback_id = Feedback.query.filter_by(name="Stats Test").order_by(Feedback.id.desc()).first().id
+
+    response = admin_client.get("/admin")
+    assert response.status_code == 200
+    assert b"Question:" in response.data
+
+    admin_client.post("/admin/delete/%d" % feedback_id)
+    with flask_app.app_context():
+        assert feedback_stats.get()["total"] == before
+
+
+def test_export_csv_streams_filtered_rows(admin_client, add_feedback):
+    import gzip
+    from app import Feedback
+
+    add_feedback(Feedback(name="Export Test", category="Bug Report", message="exporttoken, with a comma", sentiment="Negative"))
+
+    response = admin_client.get("/export/csv?search=exporttoken")
+    assert response.status_code == 200
+    assert response.is_streamed
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0].startswith("ID,Name,Email")
+    assert len(lines) == 2 and '"exporttoken, with a comma"' in lines[1]
+
+    response = admin_client.get("/export/csv?search=exporttoken&gzip=1")
+    assert response.mimetype == "application/gzip"
+    assert gzip.decompress(response.get_data()).decode().splitlines() == lines
+
+    # Bad dates are caught before the download starts, not halfway through it
+    for export_format in ("csv", "pdf"):
+        response = admin_client.get("/export/%s?date_start=yesterday" % export_format, follow_redirects=True)
+        assert response.request.path == "/admin"
+        assert "Dates must be in YYYY-MM-DD format" in response.get_data(as_text=True)
+
+
+def test_export_pdf_runs_as_cached_background_job(admin_client):
+    from app import export_jobs
+
+    response = admin_client.get("/export/pdf?category=Complaint")
+    if response.status_code == 200:
+        job_id = response.data.split(b"/export/jobs/")[1].split(b"'")[0].decode()
+        export_jobs.wait(job_id, timeout=30)
+        status = admin_client.get("/export/jobs/" + job_id).get_json()
+        assert status["status"] == "done"
+        response = admin_client.get(status["download_url"])
+    else:
+        response = admin_client.get(response.headers["Location"])
+
+    assert response.mimetype == "application/pdf"
+    body = response.get_data()
+    assert body.startswith(b"%PDF-") and body.rstrip().endswith(b"%%EOF")
+
+    # The same filters against unchanged data are served from the cache
+    response = admin_client.get("/export/pdf?category=Complaint")
+    assert response.status_code == 302
+    assert "/download" in response.headers["Location"]
+
+    # Text the standard fonts can't show is counted rather than dropped silently
+    import io
+    from pdf_export import PDFTableWriter
+    writer = PDFTableWriter(io.BytesIO(), [("Name", 1), ("Message", 3)], "Export")
+    writer.add_row(["Zoë", "Café crème, très bien"])
+    writer.add_row(["Иван", "Отличный музей"])
+    writer.close()
+    assert (writer.rows, writer.lossy_rows) == (2, 1)
+
+
+def test_search_index_ranks_prefixes_and_highlights(flask_app, client, add_feedback):
+    from app import db, Feedback, search_index
+
+    if not search_index.enabled:
+        pytest.skip("SQLite was built without FTS5")
+
+    ids = add_feedback(
+        Feedback(name="Search Test", category="Compliment", message="The ftsquokka <exhibit> was ftsquokka-tastic", sentiment="Positive"),
+        Feedback(name="Search Test", category="Complaint", message="Parking near the ftsquokka exhibit was awful", sentiment="Negative"),
+    )
+
+    results = client.get("/api/search?q=ftsquok").get_json()
+    assert [result["id"] for result in results] == ids
+    assert "<mark>ftsquokka</mark>" in results[0]["snippet"]
+    assert "&lt;exhibit&gt;" in results[0]["snippet"]
+
+    response = client.get("/archive?search=ftsquok+parking")
+    assert response.data.count(b"<mark>") == 2
+    assert b"<mark>Parking</mark>" in response.data
+
+    # Deleted rows leave the index
+    with flask_app.app_context():
+        Feedback.query.filter(Feedback.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+    assert client.get("/api/search?q=ftsquok").get_json() == []
+
+
+def test_migrations_upgrade_legacy_database_in_place(tmp_path):
+    import sqlite3
+    from sqlalchemy import create_engine, inspect
+    import migrations
+
+    # A feedback.db created by the old db.create_all(), without indexes
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE feedback (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, email VARCHAR(100), "
+            "category VARCHAR(50) NOT NULL, message TEXT NOT NULL, sentiment VARCHAR(20), submitted_at DATETIME)"
+        )
+        connection.execute("INSERT INTO feedback (name, category, message) VALUES ('Old', 'Question', 'Still here?')")
+
+    engine = create_engine("sqlite:///%s" % path)
+    applied = migrations.upgrade(engine)
+    assert [version for version, _ in applied] == [m[0] for m in migrations.MIGRATIONS]
+    assert migrations.upgrade(engine) == []
+
+    inspector = inspect(engine)
+    assert inspector.has_table("user")
+    assert "ix_feedback_submitted_at_id" in {index["name"] for index in inspector.get_indexes("feedback")}
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT name FROM feedback").scalar() == "Old"
+
+
+def test_route_queries_avoid_full_table_scans(flask_app):
+    from app import explain_route_queries
+
+    with flask_app.app_context():
+        report = explain_route_queries()
+    assert [entry["name"] for entry in report if entry["full_scans"]] == []
+
+
+def test_api_feedback_paginates_filters_and_projects(client, add_feedback):
+    from datetime import datetime, timedelta
+    from app import Feedback, sentiment_worker
+
+    started = datetime.utcnow() - timedelta(seconds=1)
+    ids = add_feedback(*[Feedback(name="API %d" % i, category="Question", message="apitoken %d" % i) for i in range(3)])
+
+    response = client.get("/api/feedback?search=apitoken&fields=id,sentiment&page_size=2")
+    assert response.status_code == 200
+    assert response.get_json() == [{"id": ids[2], "sentiment": None}, {"id": ids[1], "sentiment": None}]
+
+    next_url = response.headers["Link"].split(">")[0].lstrip("<")
+    assert client.get(next_url).get_json() == [{"id": ids[0], "sentiment": None}]
+    assert "Link" not in client.get(next_url).headers
+
+    # Classifying the rows bumps updated_at, so they show up in an incremental sync
+    for feedback_id in ids:
+        sentiment_worker.enqueue(feedback_id)
+    sentiment_worker.start()
+    sentiment_worker.wait(timeout=10)
+    synced = client.get("/api/feedback?search=apitoken&updated_since=" + started.isoformat()).get_json()
+    assert [item["id"] for item in synced] == ids
+    assert all(item["sentiment"] == "Neutral" for item in synced)
+
+    assert client.get("/api/feedback?fields=password").status_code == 400
+    assert client.get("/api/feedback?date_start=yesterday").status_code == 400
+
+
+def test_read_endpoints_answer_conditional_gets(flask_app, client):
+    from datetime import datetime, timedelta
+    from app import db, Feedback, FeedbackVersion
+
+    # Last-Modified is withheld until the second of the latest write has passed
+    with flask_app.app_context():
+        db.session.get(FeedbackVersion, 1).changed_at = datetime.utcnow() + timedelta(seconds=5)
+        db.session.commit()
+    response = client.get("/archive")
+    assert "Last-Modified" not in response.headers
+    response = client.get("/api/feedback", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert response.status_code == 200
+
+    with flask_app.app_context():
+        db.session.get(FeedbackVersion, 1).changed_at = datetime.utcnow() - timedelta(seconds=2, milliseconds=300)
+        db.session.commit()
+    response = client.get("/archive")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+    etag = response.headers["ETag"]
+    last_modified = response.headers["Last-Modified"]
+
+    response = client.get("/archive", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+    response = client.get("/api/feedback", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    # Any committed write moves the shared data version on
+    with flask_app.app_context():
+        row = Feedback(name="Version Test", category="Question", message="Open late?", sentiment="Neutral")
+        db.session.add(row)
+        db.session.commit()
+        db.session.delete(row)
+        db.session.commit()
+    response = client.get("/archive", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    response = client.get("/api/feedback", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 200
+
+
+def test_bulk_feedback_reports_per_row_results(flask_app, client, monkeypatch):
+    import json
+    from datetime import datetime, timedelta
+    from app import db, Feedback
+
+    rows = [
+        {"name": "Bulk 1", "category": "Compliment", "message": "bulktoken wonderful staff", "submitted_at": "2025-03-01T09:30:00"},
+        {"name": "Bulk 2", "category": "Question", "message": ""},
+        {"name": "Bulk 3", "email": "not-an-email", "category": "Question", "message": "bulktoken hello"},
+        {"name": "Bulk 4", "category": "Complaint", "message": "bulktoken terrible, awful queue"},
+    ]
+    body = "\n".join(json.dumps(row) for row in rows) + "\n{broken"
+    response = client.post("/api/feedback/bulk", data=body, content_type="application/x-ndjson")
+    assert response.status_code == 200
+    data = response.get_json()
+
+    assert (data["created"], data["failed"]) == (2, 3)
+    assert [result["status"] for result in data["results"]] == ["created", "error", "error", "created", "error"]
+    assert data["results"][2]["error"] == "Please enter a valid email address"
+    assert data["results"][4]["error"] == "Invalid JSON"
+
+    with flask_app.app_context():
+        first = db.session.get(Feedback, data["results"][0]["id"])
+        assert first.sentiment == "Positive"
+        assert first.submitted_at.isoformat() == "2025-03-01T09:30:00"
+        assert db.session.get(Feedback, data["results"][3]["id"]).sentiment == "Negative"
+
+    # A replayed row keeps its old submitted_at but still reaches incremental syncs
+    synced_from = datetime.utcnow() - timedelta(seconds=1)
+    response = client.post("/api/feedback/bulk", json=rows[:1])
+    assert response.get_json()["created"] == 1
+    synced = client.get("/api/feedback?updated_since=" + synced_from.isoformat()).get_json()
+    replayed = [item for item in synced if item["id"] == response.get_json()["results"][0]["id"]]
+    assert [item["submitted_at"] for item in replayed] == ["2025-03-01 09:30:00"]
+
+    # Offsets are converted to the naive UTC the table stores
+    response = client.post("/api/feedback/bulk", json=[dict(rows[0], submitted_at="2025-03-01T09:30:00+05:00")])
+    with flask_app.app_context():
+        stored = db.session.get(Feedback, response.get_json()["results"][0]["id"])
+        assert stored.submitted_at.isoformat() == "2025-03-01T04:30:00"
+    assert client.post("/api/feedback/bulk", json={"not": "a list"}).status_code == 400
+
+    # Values longer than their columns are per-row errors
+    response = client.post("/api/feedback/bulk", json=[dict(rows[0], name="x" * 101), rows[3]])
+    data = response.get_json()
+    assert (data["created"], data["failed"]) == (1, 1)
+    assert data["results"][0]["error"] == "Name must be at most 100 characters"
+
+    # A batch the database rejects is reported per row; the others still land
+    import app as app_module
+    monkeypatch.setitem(flask_app.config, "BULK_BATCH_SIZE", 1)
+    scalars = db.session.scalars
+    calls = []
+
+    def failing_scalars(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise app_module.SQLAlchemyError("rejected")
+        return scalars(*args, **kwargs)
+
+    monkeypatch.setattr(db.session, "scalars", failing_scalars)
+    data = client.post("/api/feedback/bulk", json=[rows[0], rows[3]]).get_json()
+    monkeypatch.undo()
+    assert (data["created"], data["failed"]) == (1, 1)
+    assert [result["status"] for result in data["results"]] == ["error", "created"]
+
+    # Bodies are capped before they are parsed
+    monkeypatch.setitem(flask_app.config, "MAX_CONTENT_LENGTH", 100)
+    assert client.post("/api/feedback/bulk", json=rows).status_code == 413
+
+
+def test_reclassify_command_updates_resumes_and_dry_runs(flask_app, add_feedback, tmp_path, monkeypatch):
+    import json
+    from datetime import datetime
+    from app import db, Feedback
+
+    monkeypatch.setitem(flask_app.config, "RECLASSIFY_CHECKPOINT", str(tmp_path / "reclassify.json"))
+    ids = add_feedback(
+        Feedback(name="Reclassify Test", category="Compliment", message="What a wonderful, excellent visit!",
+                 sentiment="Negative", submitted_at=datetime(2099, 1, 1)),
+        Feedback(name="Reclassify Test", category="Compliment", message="The staff were rude and unhelpful.",
+                 sentiment="Negative", submitted_at=datetime(2099, 1, 2)),
+        Feedback(name="Reclassify Test", category="Complaint", message="What a wonderful, excellent visit!",
+                 sentiment=None, submitted_at=datetime(2099, 1, 3)),
+    )
+
+    runner = flask_app.test_cli_runner()
+    result = runner.invoke(args=["feedback", "reclassify", "--since", "2099-01-01", "--dry-run", "--workers", "1"])
+    assert result.exit_code == 0, result.output
+    assert "Would change 2 of 3 rows" in result.output
+    with flask_app.app_context():
+        assert db.session.get(Feedback, ids[0]).sentiment == "Negative"
+
+    result = runner.invoke(args=["feedback", "reclassify", "--since", "2099-01-01", "--category", "Compliment",
+                                 "--workers", "1", "--chunk-size", "1"])
+    assert result.exit_code == 0, result.output
+    assert "Negative -> Positive" in result.output and "Changed 1 of 2 rows" in result.output
+    with open(flask_app.config["RECLASSIFY_CHECKPOINT"]) as f:
+        assert json.load(f)["last_id"] == ids[1]
+
+    # A second run with the same filters picks up after the checkpoint
+    result = runner.invoke(args=["feedback", "reclassify", "--since", "2099-01-01", "--category", "Compliment",
+                                 "--workers", "1"])
+    assert "Resumed after id %d" % ids[1] in result.output and "Changed 0 of 0 rows" in result.output
+
+    result = runner.invoke(args=["feedback", "reclassify", "--since", "2099-01-01", "--workers", "2"])
+    assert result.exit_code == 0, result.output
+    assert "Pending -> Positive" in result.output
+    with flask_app.app_context():
+        assert [db.session.get(Feedback, feedback_id).sentiment for feedback_id in ids] == [
+            "Positive", "Negative", "Positive"]
+
+
+def test_daily_stats_rollup_tracks_writes_and_serves_timeseries(flask_app, client, add_feedback):
+    from datetime import datetime
+    from app import db, Feedback, DailyStats, rebuild_daily_stats
+
+    def series():
+        data = client.get("/api/stats/timeseries?start=2098-12-31&end=2099-01-02&category=Suggestion").get_json()
+        return [(day["date"], day["total"], day["sentiment"]) for day in data["days"]]
+
+    ids = add_feedback(
+        Feedback(name="Rollup Test", category="Suggestion", message="a", sentiment="Positive", submitted_at=datetime(2099, 1, 1, 9)),
+        Feedback(name="Rollup Test", category="Suggestion", message="b", sentiment="Positive", submitted_at=datetime(2099, 1, 1, 18)),
+        Feedback(name="Rollup Test", category="Suggestion", message="c", sentiment=None, submitted_at=datetime(2099, 1, 2, 9)),
+    )
+
+    assert series() == [
+        ("2098-12-31", 0, {}),
+        ("2099-01-01", 2, {"Positive": 2}),
+        ("2099-01-02", 1, {"Pending": 1}),
+    ]
+
+    with flask_app.app_context():
+        db.session.get(Feedback, ids[2]).sentiment = "Negative"
+        db.session.delete(db.session.get(Feedback, ids[0]))
+        db.session.commit()
+    assert series()[1:] == [("2099-01-01", 1, {"Positive": 1}), ("2099-01-02", 1, {"Negative": 1})]
+
+    with flask_app.app_context():
+        incremental = sorted(tuple(row) for row in db.session.query(
+            DailyStats.day, DailyStats.category, DailyStats.sentiment, DailyStats.count))
+        rebuild_daily_stats()
+        assert sorted(tuple(row) for row in db.session.query(
+            DailyStats.day, DailyStats.category, DailyStats.sentiment, DailyStats.count)) == incremental
+
+    assert client.get("/api/stats/timeseries?start=2099-01-02&end=2099-01-01").status_code == 400
+    assert client.get("/api/stats/timeseries?start=yesterday").status_code == 400
+
+
+def test_admin_events_stream_new_and_deleted_rows(flask_app, admin_client):
+    import json
+    import queue
+    import threading
+
+    def listen(headers=None):
+        # Request and read the stream on its own thread, as a separate browser tab would
+        chunks = queue.Queue()
+
+        def read():
+            client = flask_app.test_client()
+            with client.session_transaction() as sess:
+                sess["logged_in"] = True
+            response = client.get("/admin/events", headers=headers or {}, buffered=False)
+            assert response.mimetype == "text/event-stream"
+            for chunk in response.response:
+                chunks.put(chunk.decode())
+                if chunk.startswith(b"event: reset") or chunks.qsize() > 20:
+                    break
+            response.close()
+            chunks.put(None)
+
+        threading.Thread(target=read, daemon=True).start()
+        return lambda: chunks.get(timeout=10)
+
+    next_chunk = listen()
+    assert next_chunk().startswith("retry:")
+
+    admin_client.post("/submit", data={"name": "Live Feed Test", "category": "Suggestion", "message": "More benches"})
+    lines = dict(line.split(": ", 1) for line in next_chunk().strip().split("\n"))
+    assert lines["event"] == "feedback"
+    data = json.loads(lines["data"])
+    assert "Live Feed Test" in data["rows"] and data["stats"]["total"] >= 1
+    feedback_id = int(data["rows"].split('data-feedback-id="')[1].split('"')[0])
+    assert data["created"] == [feedback_id]
+
+    # Streams are capped per process, since each one holds a thread
+    max_streams, flask_app.config["EVENTS_MAX_STREAMS"] = flask_app.config["EVENTS_MAX_STREAMS"], 1
+    try:
+        response = admin_client.get("/admin/events")
+        assert response.status_code == 503 and "Retry-After" in response.headers
+    finally:
+        flask_app.config["EVENTS_MAX_STREAMS"] = max_streams
+
+    admin_client.post("/admin/delete/%d" % feedback_id)
+    deleted = []
+    while feedback_id not in deleted:
+        deleted.extend(json.loads(next_chunk().split("data: ", 1)[1])["deleted"])
+
+    # A client whose missed events are no longer buffered is told to reload
+    next_chunk = listen({"Last-Event-ID": "1"})
+    assert next_chunk().startswith("retry:")
+    assert next_chunk().startswith("event: reset")
+    assert next_chunk() is None
+
+
+def test_workers_starting_together_share_setup(tmp_path):
+    import os
+    import sqlite3
+    import subprocess
+    import sys
+    import migrations
+
+    # Several workers booting at once against a brand new database
+    env = dict(os.environ, FEEDBACK_SQLALCHEMY_DATABASE_URI="sqlite:///%s" % (tmp_path / "fresh.db"))
+    script = (
+        "import sys\n"
+        "from app import create_app, init_database\n"
+        "app = create_app(instance_path=sys.argv[1])\n"
+        "with app.app_context():\n"
+        "    init_database()\n"
+        "print(app.config['SECRET_KEY'])"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    workers = [
+        subprocess.Popen([sys.executable, "-c", script, str(tmp_path / "instance")], cwd=root, env=env,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        for _ in range(4)
+    ]
+    results = [worker.communicate(timeout=60) for worker in workers]
+    assert [worker.returncode for worker in workers] == [0] * 4, results[0][1].decode()
+    assert len({stdout for stdout, _ in results}) == 1
+
+    with sqlite3.connect(tmp_path / "fresh.db") as connection:
+        assert connection.execute("SELECT count(*) FROM user WHERE username = 'admin'").fetchone() == (1,)
+        versions = [row[0] for row in connection.execute("SELECT version FROM schema_migrations ORDER BY version")]
+    assert versions == [m[0] for m in migrations.MIGRATIONS]
+
+    # Only the process holding the backlog lock scans for unclassified rows
+    from app import claim_process_lock
+    app = build_app(tmp_path)
+    held = claim_process_lock(app, "sentiment-backlog.lock")
+    assert held is not None
+    assert claim_process_lock(app, "sentiment-backlog.lock") is None
+    held.close()
+    claim_process_lock(app, "sentiment-backlog.lock").close()
+
+
+def test_sqlite_profile_sets_pragmas_and_pools_file_databases(tmp_path):
+    from sqlalchemy import text
+    from app import db
+
+    app = build_app(tmp_path, {"SQLITE_PRAGMAS": {"cache_size": -2000}, "DATABASE_POOL_SIZE": 3})
+    with app.app_context():
+        with db.engine.connect() as connection:
+            pragmas = {name: connection.execute(text("PRAGMA %s" % name)).scalar()
+                       for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size")}
+        assert pragmas == {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000, "cache_size": -2000}
+        assert db.engine.pool.size() == 3
+        db.engine.dispose()
+
+    # In-memory databases keep a single shared connection and SQLite's defaults
+    app = build_app(tmp_path, {"SQLALCHEMY_DATABASE_URI": "sqlite://", "SQLITE_PROFILE": "default"})
+    with app.app_context():
+        assert db.engine.pool.__class__.__name__ == "StaticPool"
+        assert db.session.execute(text("PRAGMA temp_store")).scalar() == 0
+
+
+def test_read_views_use_the_replica_and_writes_the_primary(tmp_path):
+    import shutil
+    from app import db, Feedback
+
+    # The replica is a snapshot of the primary taken before the new row
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    app = build_app(tmp_path, {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///%s" % primary,
+        "DATABASE_REPLICA_URI": "sqlite:///%s" % replica,
+        "SENTIMENT_ASYNC": False
+    })
+    with app.app_context():
+        init_database()
+        db.engines["replica"].dispose()
+        db.engine.dispose()
+    shutil.copy(primary, replica)
+
+    with app.test_client() as client:
+        with client.session_transaction() as sess:
+            sess["logged_in"] = True
+        response = client.post("/submit", data={
+            "name": "Replica Test", "category": "Question", "message": "Is the replica behind?"})
+        assert response.status_code == 302
+
+        with app.app_context():
+            feedback_id = Feedback.query.filter_by(name="Replica Test").one().id
+        assert b"Replica Test" not in client.get("/archive").data
+        assert b"Replica Test" not in client.get("/admin").data
+        assert client.get("/api/feedback").get_json() == []
+
+        # Deletes go to the primary even from the admin views
+        assert client.post("/admin/delete/%d" % feedback_id).status_code == 302
+        with app.app_context():
+            assert db.session.get(Feedback, feedback_id) is None
+
+    # The replica connection refuses writes that reach it
+    with app.app_context():
+        with pytest.raises(Exception, match="readonly"):
+            with db.engines["replica"].begin() as connection:
+                connection.execute(Feedback.__table__.delete())
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_metrics_report_request_phases_and_sampled_stacks(tmp_path):
+    import time
+    from app import db, Feedback
+
+    app = build_app(tmp_path, {
+        "METRICS_TOKEN": "scrape-me",
+        "PROFILE_SAMPLING": True,
+        "PROFILE_INTERVAL": 0.001,
+        "PROFILE_KEEP": 1,
+        "PROFILE_DIR": str(tmp_path / "profiles")
+    })
+    with app.app_context():
+        init_database()
+        db.session.add(Feedback(name="Metrics Test", category="Question", message="Any tours today?"))
+        db.session.commit()
+
+    def slow_view():
+        time.sleep(0.2)
+        return "done"
+    app.add_url_rule("/slow", "slow", slow_view)
+
+    with app.test_client() as client:
+        assert client.get("/archive").status_code == 200
+        assert client.get("/slow").status_code == 200
+
+        assert client.get("/metrics").status_code == 401
+        response = client.get("/metrics", headers={"Authorization": "Bearer scrape-me"})
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        body = response.get_data(as_text=True)
+
+    samples = dict(line.rsplit(" ", 1) for line in body.splitlines() if not line.startswith("#"))
+    assert float(samples['feedback_request_queries_total{endpoint="main.archive"}']) >= 1
+    assert float(samples['feedback_request_rows_total{endpoint="main.archive"}']) >= 1
+    assert float(samples['feedback_request_phase_seconds_total{endpoint="main.archive",phase="render"}']) > 0
+    assert float(samples['feedback_request_phase_seconds_total{endpoint="main.archive",phase="sql"}']) > 0
+    assert samples['feedback_request_duration_seconds_count{endpoint="slow",method="GET",status="200"}'] == "1"
+
+    # Only the slowest request is kept, as collapsed stacks that end in the view
+    profiles = list((tmp_path / "profiles").glob("*.folded"))
+    assert len(profiles) == 1 and "-slow-" in profiles[0].name
+    stacks = profiles[0].read_text().splitlines()
+    assert any("slow_view" in line.rsplit(" ", 1)[0] for line in stacks)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+
+
+def test_seed_command_is_deterministic_and_keeps_derived_tables_in_step(tmp_path):
+    from datetime import datetime
+    from sqlalchemy import text
+    from app import db, Feedback, CATEGORIES
+
+    def seeded(name, *args):
+        app = build_app(tmp_path, {"SQLALCHEMY_DATABASE_URI": "sqlite:///%s" % (tmp_path / name)})
+        with app.app_context():
+            init_database()
+            version = db.session.execute(text("SELECT version FROM feedback_version")).scalar()
+            result = app.test_cli_runner().invoke(args=["feedback", "seed", "--end", "2025-01-01"] + list(args))
+            assert result.exit_code == 0, result.output
+            rows = db.session.query(Feedback.name, Feedback.email, Feedback.category, Feedback.message,
+                                    Feedback.sentiment, Feedback.submitted_at).order_by(Feedback.id).all()
+            derived = {
+                "stats": db.session.execute(text("SELECT sum(count) FROM feedback_daily_stats")).scalar(),
+                "pending": db.session.execute(text(
+                    "SELECT sum(count) FROM feedback_daily_stats WHERE sentiment = 'Pending'")).scalar(),
+                "search": db.session.execute(text(
+                    "SELECT count(*) FROM feedback_fts WHERE feedback_fts MATCH 'guide'")).scalar(),
+                "triggers": db.session.execute(text(
+                    "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'feedback'")).scalar(),
+                "bumped": db.session.execute(text("SELECT version FROM feedback_version")).scalar() > version
+            }
+            db.engine.dispose()
+        return rows, derived
+
+    rows, derived = seeded("a.db", "--rows", "3000", "--seed", "7", "--days", "30", "--pending", "0.1")
+    again, _ = seeded("b.db", "--rows", "3000", "--seed", "7", "--days", "30", "--pending", "0.1")
+    other, _ = seeded("c.db", "--rows", "3000", "--seed", "8", "--days", "30")
+    assert rows == again and rows != other
+    assert len(rows) == 3000 and {row.category for row in rows} <= set(CATEGORIES)
+    assert rows[0].submitted_at >= datetime(2024, 12, 2) and rows[-1].submitted_at < datetime(2025, 1, 1)
+    assert [row.submitted_at for row in rows] == sorted(row.submitted_at for row in rows)
+    assert {row.sentiment for row in rows} == {"Positive", "Negative", "Neutral", None}
+    assert derived == {
+        "stats": 3000,
+        "pending": sum(row.sentiment is None for row in rows),
+        "search": sum("guide" in row.message.lower() for row in rows),
+        "triggers": 9,
+        "bumped": True
+    }
+
+
+def test_interrupted_seed_keeps_triggers_and_derived_tables(tmp_path):
+    from sqlalchemy import text
+    from app import db, Feedback, seed_feedback
+
+    def progress(inserted):
+        raise KeyboardInterrupt
+
+    app = build_app(tmp_path)
+    with app.app_context():
+        init_database()
+        db.session.add(Feedback(name="Before Seed", category="Question", message="seedguard question"))
+        db.session.commit()
+        with pytest.raises(KeyboardInterrupt):
+            seed_feedback(100, batch_size=10, progress=progress)
+        db.session.remove()
+
+        assert db.session.execute(text(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'feedback'")).scalar() == 9
+        assert db.session.query(Feedback).count() == 1
+        version = db.session.execute(text("SELECT version FROM feedback_version")).scalar()
+
+        # Writes still reach the search index, the rollup and the data version
+        db.session.add(Feedback(name="After Seed", category="Question", message="seedguard again"))
+        db.session.commit()
+        assert db.session.execute(text(
+            "SELECT count(*) FROM feedback_fts WHERE feedback_fts MATCH 'seedguard'")).scalar() == 2
+        assert db.session.execute(text("SELECT sum(count) FROM feedback_daily_stats")).scalar() == 2
+        assert db.session.execute(text("SELECT version FROM feedback_version")).scalar() > version
+        db.engine.dispose()
+
+
+def test_listings_load_untracked_rows(flask_app, admin_client, add_feedback):
+    from app import db, Feedback, feedback_rows, LISTING_COLUMNS
+
+    feedback_id, = add_feedback(Feedback(name="Rows Test", category="Question", message="Where is the cloakroom?"))
+    with flask_app.app_context():
+        rows = feedback_rows().filter(Feedback.id == feedback_id).all()
+        assert rows[0]._fields == tuple(column.key for column in LISTING_COLUMNS)
+        assert rows[0].message == "Where is the cloakroom?"
+        assert len(db.session.identity_map) == 0
+
+    assert b"Where is the cloakroom?" in admin_client.get("/admin").data
+    assert b"Rows Test" in admin_client.get("/archive?search=cloakroom").data
+
+
+def test_lists_show_previews_and_load_full_messages_on_demand(flask_app, admin_client, add_feedback, monkeypatch):
+    from datetime import datetime
+    from app import Feedback
+
+    message = "The cafe ran out of sandwiches by noon and the queue went past the door. " * 20
+    monkeypatch.setitem(flask_app.config, "MESSAGE_PREVIEW_LENGTH", 40)
+    ids = add_feedback(
+        Feedback(name="Preview Test", category="Complaint", message=message, sentiment="Negative",
+                 submitted_at=datetime(2098, 6, 1)),
+        Feedback(name="Preview Test", category="Complaint", message="Short and sweet.", sentiment="Positive",
+                 submitted_at=datetime(2098, 6, 2)),
+    )
+
+    for url in ("/admin", "/archive?date_start=2098-01-01&date_end=2098-12-31"):
+        html = admin_client.get(url).get_data(as_text=True)
+        assert message[:40] + "&hellip;" in html and message[:41] not in html
+        assert "Short and sweet." in html
+        assert html.count('id="messageModal"') == 1
+        assert "/api/feedback/%d" % ids[0] in html
+    assert "Read more" in admin_client.get("/archive?date_start=2098-01-01&date_end=2098-12-31").get_data(as_text=True)
+
+    response = admin_client.get("/api/feedback/%d" % ids[0])
+    assert response.status_code == 200
+    assert response.get_json()["message"] == message
+    assert response.get_json()["submitted_at"] == "2098-06-01 00:00:00"
+    assert admin_client.get("/api/feedback/%d" % ids[0], headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+    assert admin_client.get("/api/feedback/999999999").status_code == 404
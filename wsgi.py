@@ -0,0 +1,13 @@
+# Production entry point. Run it under a multi-process WSGI server, e.g.
+#
+#   flask --app app feedback init     # once per deploy, before starting workers
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Workers only build the app from its configuration; schema migrations and
+# seeding are left to the init command.
+from app import create_app, sentiment_worker
+
+app = create_app()
+
+if app.config['SENTIMENT_ASYNC']:
+    sentiment_worker.start()